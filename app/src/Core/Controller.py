@@ -5,18 +5,11 @@
 # 控制用户首次设置的流程（生成密钥、分片、存储配置）。
 # 恢复时验证分片有效性并重组私钥。
 # 管理用户会话（登录态、权限验证）。
+#
+# 各窗口模块在首次 show_* 时才导入：启动时只加载登录窗口，
+# 主界面、数据库初始化、恢复界面（及其引入的 mariadb、Security.Crypto 等）不拖慢首个窗口出现。
 
-import json
-
-import Gui.HomeInterface
-import Gui.MainInterface
-import Gui.SetupInterface
-import Recovery.RecoveryInterface
-
-
-from PySide6 import QtWidgets, QtGui
-
-import Recovery
+from PySide6 import QtWidgets
 
 
 class WindowManager:
@@ -30,22 +23,27 @@ class WindowManager:
 
     @classmethod
     def show_login(cls):
+        import Gui.HomeInterface
         cls._switch_window(Gui.HomeInterface.LoginWindow, 480, 360)
 
     @classmethod
     def show_setup(cls):
+        import Gui.SetupInterface
         cls._switch_window(Gui.SetupInterface.DatabaseSetupWindow, 800, 600)
 
     @classmethod
     def show_register(cls):
+        import Gui.HomeInterface
         cls._switch_window(Gui.HomeInterface.RegistrationWindow, 480, 360)
 
     @classmethod
     def show_recovery(cls):
+        import Recovery.RecoveryInterface
         cls._switch_window(Recovery.RecoveryInterface.RecoveryUI, 400, 300)
 
     @classmethod
     def show_main(cls):
+        import Gui.MainInterface
         cls._switch_window(Gui.MainInterface.MainWindow, 800, 600)
 
     @classmethod
@@ -138,6 +138,114 @@ class MariaDBCourier:
             self.connection.rollback()
             return False
 
+    def update_password_hash(self, user_id: int, password_hash: str) -> bool:
+        """
+        更新用户口令哈希（登录时升级旧哈希）
+
+        :param user_id: 用户ID
+        :param password_hash: Security.Password.hash_password 生成的哈希
+        :return: 是否更新成功
+        """
+        return bool(self.execute_query("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id)))
+
+    def get_user_id(self, username: str) -> Optional[int]:
+        """按用户名查询用户ID，不存在时返回None"""
+        row = self.execute_query("SELECT id FROM users WHERE username = ?", (username,), fetch_all=False)
+        return row[0] if row else None
+
+    def get_data_key(self, user_id: int) -> Optional[bytes]:
+        """
+        读取用户封装后的数据密钥
+
+        :param user_id: 用户ID
+        :return: 列子密钥或 RSA-OAEP 封装的数据密钥，尚未创建时返回None
+        """
+        row = self.execute_query("SELECT wrapped_key FROM data_keys WHERE user_id = ?", (user_id,),
+                                 fetch_all=False)
+        return bytes(row[0]) if row else None
+
+    def get_recovery_key(self, user_id: int) -> Optional[bytes]:
+        """
+        读取数据密钥的恢复副本（忘记口令、由分片恢复RSA私钥后用它取回数据密钥）
+
+        :param user_id: 用户ID
+        :return: RSA-OAEP 封装的数据密钥，没有恢复副本时返回None
+        """
+        row = self.execute_query("SELECT recovery_key FROM data_keys WHERE user_id = ?", (user_id,),
+                                 fetch_all=False)
+        return bytes(row[0]) if row and row[0] is not None else None
+
+    def store_data_key(self, user_id: int, wrapped_key: bytes, recovery_key: bytes = None) -> bool:
+        """
+        保存用户封装后的数据密钥（已存在时不覆盖，避免并发登录时生成两把密钥）
+
+        :param user_id: 用户ID
+        :param wrapped_key: 列子密钥或 RSA-OAEP 封装的数据密钥
+        :param recovery_key: RSA-OAEP 封装的恢复副本
+        :return: 是否写入了新密钥
+        """
+        rowcount = self.execute_query(
+            "INSERT IGNORE INTO data_keys (user_id, wrapped_key, recovery_key) VALUES (?, ?, ?)",
+            (user_id, wrapped_key, recovery_key))
+        return bool(rowcount)
+
+    def update_data_key(self, user_id: int, wrapped_key: bytes, recovery_key: bytes = None) -> bool:
+        """
+        改写用户封装后的数据密钥（更换封装密钥时使用，数据密钥本身不变）
+
+        :param user_id: 用户ID
+        :param wrapped_key: 新的封装结果
+        :param recovery_key: RSA-OAEP 封装的恢复副本，为None时保留原有副本
+        :return: 是否更新成功
+        """
+        if recovery_key is None:
+            return bool(self.execute_query("UPDATE data_keys SET wrapped_key = ? WHERE user_id = ?",
+                                           (wrapped_key, user_id)))
+        return bool(self.execute_query("UPDATE data_keys SET wrapped_key = ?, recovery_key = ? WHERE user_id = ?",
+                                       (wrapped_key, recovery_key, user_id)))
+
+    def add_token(self, user_id: int, token_name: str, token_value: bytes, algorithm: str = 'SHA1',
+                  digits: int = 6, period: int = 30) -> bool:
+        """
+        保存令牌，token_value 必须是 Security.Crypto.ColumnCipher 加密后的密文
+
+        :return: 是否保存成功
+        """
+        rowcount = self.execute_query(
+            "INSERT INTO tokens (user_id, token_name, token_value, algorithm, digits, period) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, token_name, token_value, algorithm, digits, period)
+        )
+        return bool(rowcount)
+
+    def update_token_value(self, token_id: int, token_value: bytes) -> bool:
+        """
+        改写令牌值（旧版明文令牌重新加密时使用）
+
+        :param token_id: 令牌ID
+        :param token_value: Security.Crypto.ColumnCipher 加密后的密文
+        :return: 是否更新成功
+        """
+        return bool(self.execute_query("UPDATE tokens SET token_value = ? WHERE id = ?", (token_value, token_id)))
+
+    def list_tokens(self, user_id: int) -> List[tuple]:
+        """
+        读取用户的全部令牌（一次查询，令牌值保持加密，使用时再解密）
+
+        :param user_id: 用户ID
+        :return: [(id, token_name, token_value 密文, algorithm, digits, period), ...]
+        """
+        rows = self.execute_query(
+            "SELECT id, token_name, token_value, algorithm, digits, period "
+            "FROM tokens WHERE user_id = ? ORDER BY token_name",
+            (user_id,)
+        )
+        return [(row[0], row[1], bytes(row[2]), *row[3:]) for row in rows or []]
+
+    def delete_token(self, user_id: int, token_id: int) -> bool:
+        """删除令牌"""
+        return bool(self.execute_query("DELETE FROM tokens WHERE user_id = ? AND id = ?", (user_id, token_id)))
+
     def create_table(self, table_name: str, schema: str) -> bool:
         """
         创建数据表
@@ -179,13 +287,20 @@ class MariaDBCourier:
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 user_id INT NOT NULL,
                 token_name VARCHAR(50) NOT NULL,
-                token_value VARCHAR(255) NOT NULL,
+                token_value VARBINARY(512) NOT NULL,
                 algorithm VARCHAR(20) DEFAULT 'SHA1',
                 digits INT DEFAULT 6,
                 period INT DEFAULT 30,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users(id),
                 UNIQUE (user_id, token_name)
+            """,
+            'data_keys': """
+                user_id INT PRIMARY KEY,
+                wrapped_key VARBINARY(512) NOT NULL,
+                recovery_key VARBINARY(512),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
             """
         }
 
@@ -194,5 +309,12 @@ class MariaDBCourier:
             if not self.create_table(table_name, schema):
                 success = False
 
+        # 早期创建的表：tokens.token_value 为 VARCHAR(255)，二进制密文会被字符集截断或改写；data_keys 没有恢复副本列
+        # 其中已有的明文令牌值在登录时由 Service.Session 重新加密
+        for statement in ("ALTER TABLE tokens MODIFY token_value VARBINARY(512) NOT NULL",
+                          "ALTER TABLE data_keys ADD COLUMN IF NOT EXISTS recovery_key VARBINARY(512)"):
+            if self.execute_query(statement) is None:
+                success = False
+
         return success
 
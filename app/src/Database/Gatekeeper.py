@@ -1,3 +1,7 @@
+# 数据库配置加密存储
+# 功能点：
+# 默认使用 key/key.key 中的 Fernet 密钥：登录前就要连接数据库验证口令，此时还没有根密钥。
+# 解锁后需要由根密钥保护的配置可传入 key=Security.KeyHierarchy.fernet_key(LABEL_DB_CONFIG)。
 
 import json
 import os
@@ -17,26 +21,38 @@ def generate_key():
         f.write(key)
     return key
 
-def save_config(config: dict):
-    """加密保存配置"""
-    if not os.path.exists(KEY_PATH):
-        generate_key()
-
+def _load_key() -> bytes:
     with open(KEY_PATH, "rb") as f:
-        key = f.read()
+        return f.read()
+
+def save_config(config: dict, key: bytes = None, path: str = CONFIG_PATH):
+    """
+    加密保存配置
+    :param config: 配置字典
+    :param key: Fernet 密钥，为None时使用 key/key.key（不存在时生成）
+    :param path: 配置文件路径
+    """
+    if key is None:
+        if not os.path.exists(KEY_PATH):
+            generate_key()
+        key = _load_key()
 
     fernet = Fernet(key)
     encrypted = fernet.encrypt(json.dumps(config).encode())
 
-    with open(CONFIG_PATH, "wb") as f:
+    with open(path, "wb") as f:
         f.write(encrypted)
 
-def load_config() -> dict:
-    """解密读取配置"""
-    with open(KEY_PATH, "rb") as f:
-        key = f.read()
+def load_config(key: bytes = None, path: str = CONFIG_PATH) -> dict:
+    """
+    解密读取配置
+    :param key: Fernet 密钥，为None时使用 key/key.key
+    :param path: 配置文件路径
+    """
+    if key is None:
+        key = _load_key()
 
-    with open(CONFIG_PATH, "rb") as f:
+    with open(path, "rb") as f:
         encrypted = f.read()
 
     fernet = Fernet(key)
@@ -1,4 +1,3 @@
-import hashlib
 import re
 import os
 
@@ -19,10 +18,10 @@ from PySide6.QtCore import Qt, QSize, Signal, QTimer
 
 import Core.Controller
 import Core.FileDigester
-import Database.Courier
-import Database.Gatekeeper
 import Log.LoginLogger
 
+# 数据库与加密模块（mariadb、Security.*、Service.*）在首次登录或注册时才导入，登录窗口无需等待它们加载
+
 
 class LoginWindow(QtWidgets.QWidget):
     def __init__(self):
@@ -224,28 +223,40 @@ class RegistrationWindow(QtWidgets.QWidget):
             QMessageBox.critical(self, "输入错误", "\n".join(errors))
 
         if not errors:
+            import Database.Courier
+            import Database.Gatekeeper
+            import Security.KeyPool
+            import Security.Password
+
             try:
-                # 生成加盐哈希密码
-                salt = os.urandom(32)
-                key = hashlib.pbkdf2_hmac(
-                    'sha256',
-                    password.encode('utf-8'),
-                    salt,
-                    100000
-                )
-                password_hash = f"{salt.hex()}:{key.hex()}"
+                # 生成加盐哈希密码（参数为本机校准结果，记录在哈希字符串中）
+                password_hash = Security.Password.hash_password(password)
 
                 # 执行数据库操作
                 with Database.Courier.MariaDBCourier(Database.Gatekeeper.load_config()) as courier:
                     if courier.reg_new_user(username, password_hash, email):
-                        QMessageBox.information(self, "成功", "注册成功")
-                        self.close()
-                        Core.Controller.WindowManager.show_login()
+                        # 密钥对从后台密钥池获取并保存，不阻塞界面；保存完成后再提示结果
+                        self.register_btn.setEnabled(False)
+                        self.provision_thread = KeyProvisionThread(
+                            Security.KeyPool.provision_user_keypair(username))
+                        self.provision_thread.result_signal.connect(self.handle_provision_result)
+                        self.provision_thread.start()
                     else:
                         QMessageBox.critical(self, "错误", "用户名或邮箱已存在")
             except Exception as e:
                 QMessageBox.critical(self, "系统错误", f"数据库连接失败: {str(e)}")
 
+    def handle_provision_result(self, result):
+        """处理密钥对保存结果"""
+        self.register_btn.setEnabled(True)
+        if isinstance(result, Exception):
+            Log.LoginLogger.login_error_log(f"[REGISTER] 密钥对保存失败：{str(result)}")
+            QMessageBox.critical(self, "错误", f"注册成功，但密钥对保存失败: {str(result)}")
+            return
+        QMessageBox.information(self, "成功", "注册成功")
+        self.close()
+        Core.Controller.WindowManager.show_login()
+
 
 
 
@@ -274,6 +285,12 @@ class LoginThread(QtCore.QThread):
         self.password = password
 
     def run(self):
+        # 在登录线程中导入，界面线程不因加载数据库与加密模块而卡顿
+        import Database.Courier
+        import Database.Gatekeeper
+        import Security.KeyHierarchy
+        import Security.Password
+        import Service.Session
 
         try:
             with Database.Courier.MariaDBCourier(Database.Gatekeeper.load_config()) as courier:
@@ -306,28 +323,44 @@ class LoginThread(QtCore.QThread):
                 user_id, stored_hash, username = user_data
 
 
-                # 密码验证
-                if ":" in stored_hash:  # PBKDF2
-                    salt_hex, key_hex = stored_hash.split(":")
-                    salt = bytes.fromhex(salt_hex)
-
-                    new_key = hashlib.pbkdf2_hmac(
-                        'sha256',
-                        self.password.encode(),
-                        salt,
-                        100000
-                    ).hex()
-
-                    is_valid = (new_key == key_hex)
-                else:  # 兼容旧版SHA256
-                    current_hash = hashlib.sha256(
-                        self.password.encode()
-                    ).hexdigest()
-                    is_valid = (current_hash == stored_hash)
+                # 密码验证与解锁共用一次口令拉伸；旧格式或弱于当前参数的哈希在验证成功后升级
+                is_valid, new_hash, root_key = Security.Password.unlock(self.password, stored_hash)
+                if new_hash is not None:
+                    if courier.update_password_hash(user_id, new_hash):
+                        Log.LoginLogger.login_info_log(f"[AUTH] 用户 {username} 的口令哈希已升级")
+                    elif not Security.Password.has_root_key(stored_hash):
+                        # 新生成的根密钥未能保存时不使用，避免数据密钥被封装到下次登录取不到的密钥下
+                        root_key = None
 
                 Log.LoginLogger.login_info_log(f"[AUTH] 用户 {username} 尝试登录，密码验证结果：{is_valid}")
+                if is_valid:
+                    if root_key is not None:
+                        Security.KeyHierarchy.unlock(root_key)
+                    # 数据密钥只在登录时解封一次，令牌值在查看时才解密
+                    try:
+                        Service.Session.start_session(courier, user_id)
+                    except Exception as e:
+                        Log.LoginLogger.login_error_log(f"[AUTH] 数据密钥解封失败：{str(e)}")
                 self.result_signal.emit(is_valid)
 
         except Exception as e:
             Log.LoginLogger.login_error_log(f"[AUTH 错误] {str(e)}")
             self.result_signal.emit(e)
+
+
+class KeyProvisionThread(QtCore.QThread):
+    result_signal = QtCore.Signal(object)
+
+    def __init__(self, future):
+        """
+        :param future: Security.KeyPool.provision_user_keypair 返回的 Future
+        """
+        super().__init__()
+        self.future = future
+
+    def run(self):
+        # Future 的回调在密钥池线程中执行，不能直接操作界面，这里等待结果后经信号交回界面线程
+        try:
+            self.result_signal.emit(self.future.result())
+        except Exception as e:
+            self.result_signal.emit(e)
@@ -4,6 +4,10 @@ from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QLabel, QVBoxLayout, QPushButton, QHBoxLayout, QWidget, QFileDialog, QLineEdit, \
     QListWidget, QListWidgetItem, QStackedWidget, QScrollArea, QApplication, QMessageBox
 
+import Security.Crypto
+import Security.KeyHierarchy
+import Service.Session
+
 
 # 数据模型
 class RecoveryCode:
@@ -484,10 +488,14 @@ class MainWindow(QtWidgets.QMainWindow):
         """优雅退出程序"""
 
         # 1. 保存当前状态（根据需要添加）
-        # 2. 关闭所有子窗口
+        # 2. 清除内存中已解析的密钥、根密钥、会话数据密钥与明文缓存
+        Security.Crypto.Asymmetric.evict_keys()
+        Security.KeyHierarchy.lock()
+        Service.Session.end_session()
+        # 3. 关闭所有子窗口
         QtWidgets.QApplication.closeAllWindows()
 
-        # 3. 退出事件循环
+        # 4. 退出事件循环
 
         QtWidgets.QApplication.quit()
 
@@ -11,6 +11,7 @@ from Config.DBConfig import DBConfig
 import Database.Courier
 import Database.Gatekeeper
 import Log.SetupLogger
+import Security.Password
 
 
 class DatabaseSetupWindow(QMainWindow):
@@ -243,6 +244,13 @@ class DatabaseSetupWindow(QMainWindow):
                 # 初始化表结构
                 courier.initialize_vault_tables()
 
+            # 按本机速度校准口令哈希参数
+            self.status_output.append("▶ 校准口令哈希参数...")
+            parameters, saved = Security.Password.calibrate_and_save()
+            Log.SetupLogger.setup_info_log(f"▶ 口令哈希参数：{parameters}")
+            if not saved:
+                Log.SetupLogger.setup_error_log(f"口令哈希参数无法写入 {Security.Password.PARAMETERS_PATH}，仅本次运行有效")
+
             self.operation_complete.emit(True, "初始化成功完成！")
             Log.SetupLogger.setup_info_log("初始化成功完成！")
 
@@ -6,10 +6,16 @@ from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QGridLayout,
                                QLineEdit, QPushButton, QLabel, QMessageBox)
 from PySide6.QtCore import Qt
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import rsa, x25519
 
+import Log.DevelopLogger
+import Security.Accumulator
 import Security.Crypto
+import Security.Feldman
+import Security.LargeSplit
+import Security.Primes
 import Security.SSS
+import Security.Share
 from cryptography.hazmat.primitives import serialization
 import os
 from base64 import b64decode
@@ -95,18 +101,21 @@ def load_private_key_bytes(key_path: str) -> bytes:
 
     return raw_bytes
 
-def split_private_key_bytes(secret: bytes) -> bytes:
+def split_private_key_bytes(secret: bytes, n: int = 5, k: int = 3) -> list:
     # 使用 secp256k1 的阶作为素数 p
     # p = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
     # p太小了
     print("原秘密：",secret)
 
-    p=420980254453935008154505624481442383441615288088445880985778480721118366200529297662844223875542909878193618383615603475713639264410350373698151412688347944499416741772515069793024550389858263257671132201850967093794635420934592902972252186204604501778542125108222467602496485109294886014106398808705549529824677784747748837884875071005873927577874198472525645674931317724199867860136095632404788376205994229901216339433987568263008103029350627815366016290240983353580057456878680727890686653353313452946297864991916453905705716329261607785145363724798622186541388981272943093285082113942908496023426820951717367975656864826992215938211996700694216838727282673229236432056368929184843775049855990573967476101945368510067410822466881297597557578839817562098827589416924567376251351377861868976455618293542511085042936831850968299002562960903081650307671493771637192147193849547550575629110750111482211453228748747015746147310985184740137153138125287805665634047825666658596731658983057554294073292401585663430738516013985378090545960125427844650842568345827240482672182385730597435782404105447689154663779212990916564753208475671335811065948373309633034156969539012525157147378909560734480194711117232059511791763926112655525863809004431462057178809000875304767958713273626314935133195374134848664124582132104816905400966153302935680745261186147748799608398856044204857793004948099184383671954836450169044196468960997333602201318239870095894207912274670170153174670398937935693964721647597830265393894699525847698522600474844368147283941304989493641086617222208756300091556969039543433430369924600120741145170194638069555002206023954884092116093649788924279
-    n = 5
-    k = 3
+    # 旧版硬编码的5500位素数已收入素数注册表
+    p = Security.Primes.get_prime(Security.Primes.LEGACY_BITS)
 
-    # 分片生成
-    shares = Security.SSS.split_secret(secret, n, k, p)
+    # 分片生成（持有人较多时使用大规模分片引擎）
+    if n >= Security.LargeSplit.PARALLEL_THRESHOLD:
+        shares, timing = Security.LargeSplit.split_secret_large(secret, n, k, p)
+        Log.DevelopLogger.developer_info(f"分片耗时：{timing}")
+    else:
+        shares = Security.SSS.split_secret(secret, n, k, p)
 
     # for share in shares:
     #     print(json.dumps(share, indent=2))
@@ -114,6 +123,57 @@ def split_private_key_bytes(secret: bytes) -> bytes:
 
 
 
+def split_private_key_verifiable(secret: bytes, n: int = 5, k: int = 3, key: bytes = None):
+    """
+    可验证分片私钥（Feldman 混合模式，见 Security.Feldman.split_payload）
+    持有人可用公开的承诺校验自己的分片（Security.Feldman.verify_share），无需信任分发者
+    :param secret: 私钥字节（如 load_private_key_bytes 读取的 DER）
+    :param key: 分片标签的HMAC密钥
+    :return: (分片列表, 承诺列表, 私钥密文)；承诺与私钥密文随每个分片一同保存
+    """
+    return Security.Feldman.split_payload(secret, n, k, key)
+
+
+def restore_private_key_verifiable(shares: list, commitments: list, sealed: bytes, k: int = 3,
+                                   key: bytes = None) -> bytes:
+    """
+    由 split_private_key_verifiable 的分片恢复私钥，不符合承诺的分片不参与恢复
+    :return: 私钥字节
+    """
+    return Security.Feldman.recover_payload(shares, commitments, sealed, k, key)
+
+
+def split_x25519_private_key(n: int = 5, k: int = 3, field: str = Security.SSS.FIELD_PRIME,
+                             key: bytes = None) -> list:
+    """
+    分片X25519私钥：只分片32字节标量，默认素数取注册表中能容纳32字节的257位素数
+    :param key: 分片标签的HMAC密钥，如 Security.KeyHierarchy.subkey(LABEL_SHARE_HMAC)；
+                使用后恢复时须先解锁，忘记口令时的恢复应保持为None
+    :return: 分片文本列表（每个分片约64个字符，带 HMAC 标签时约110个字符，可打印为单个二维码）
+    """
+    scalar = Security.Crypto.Asymmetric.x25519_private_bytes()
+    p = Security.Primes.prime_for_length(len(scalar)) if field == Security.SSS.FIELD_PRIME else None
+    shares = Security.SSS.split_secret(scalar, n, k, p, key=key, field=field)
+    return [Security.Share.Share.from_dict(share, k, p).encode_text() for share in shares]
+
+
+def restore_x25519_private_key(share_texts: list, user: str, key: bytes = None) -> bool:
+    """
+    由分片文本恢复X25519私钥并写回密钥文件
+    :param share_texts: 至少k个 split_x25519_private_key 生成的分片文本
+    :param user: 用户名（写入密钥生成日志）
+    :param key: 分片时使用的HMAC密钥；给出时没有标签或标签不符的分片一律拒绝
+    """
+    shares = [Security.Share.Share.parse_text(text) for text in share_texts]
+    if key is not None and any(share.tag is None for share in shares):
+        raise ValueError("分片缺少HMAC标签")
+    k = shares[0].threshold
+    field = shares[0].field
+    scalar = Security.SSS.recover_secret([share.to_dict() for share in shares], None, k, key=key, field=field)
+    private_key = x25519.X25519PrivateKey.from_private_bytes(scalar)
+    return Security.Crypto.Asymmetric.x25519_keygen(user, private_key)
+
+
 def reconstruct_secret(secret:bytes, p , shares):
     # 模拟恢复（使用前3个分片）
     recovered_secret = Security.SSS.recover_secret(shares[:3], p, 3)
@@ -137,37 +197,117 @@ def safe_b64decode(encoded: str) -> bytes:
     return base64.b64decode(encoded + padding)
 
 
+def parse_share_text(text: str):
+    """
+    解析分片输入
+    :param text: JSON格式的分片字典，或 "x-y" 格式的十进制分片点
+    :return: 分片字典，或 (x, y) 元组
+    """
+    text = text.strip()
+    if text.startswith('{'):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"分片JSON格式错误：{str(e)}") from e
+
+    x, sep, y = text.partition('-')
+    if not sep or not x.strip().isdigit() or not y.strip().isdigit():
+        raise ValueError("分片格式应为 x-y（例如 3-12345）")
+    return int(x), int(y)
+
+
 class RecoveryUI(QWidget):
+    # 恢复阈值
+    THRESHOLD = 3
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Shamir秘密重构工具")
+        self.accumulator = None
         self.initUI()
+        self.reset_accumulator()
 
     def initUI(self):
         main_layout = QVBoxLayout()
 
         # 输入说明标签
-        instr_label = QLabel("请输入至少3个分片（格式：x-y）:")
+        instr_label = QLabel(f"请输入至少{self.THRESHOLD}个分片（格式：x-y）:")
         instr_label.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(instr_label)
 
-        # 分片输入区域
+        # 分片输入区域：每输入完一个分片即校验并累加
         grid = QGridLayout()
         self.share_edits = []
         for i in range(5):
             label = QLabel(f"分片 {i + 1}:")
             edit = QLineEdit()
             edit.setPlaceholderText("格式：x-y（例如 3-12345）")
+            edit.editingFinished.connect(lambda edit=edit: self.add_share(edit))
             self.share_edits.append(edit)
             grid.addWidget(label, i, 0)
             grid.addWidget(edit, i, 1)
 
         main_layout.addLayout(grid)
 
+        # 进度标签
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(self.status_label)
+
         # 确认按钮
         self.btn = QPushButton("重构秘密")
-        self.btn.clicked.connect(reconstruct_secret)
+        self.btn.clicked.connect(self.show_secret)
         self.btn.setStyleSheet("font-size: 16px; padding: 8px;")
         main_layout.addWidget(self.btn, alignment=Qt.AlignCenter)
 
+        # 重置按钮
+        self.reset_btn = QPushButton("重新输入")
+        self.reset_btn.clicked.connect(self.reset_accumulator)
+        main_layout.addWidget(self.reset_btn, alignment=Qt.AlignCenter)
+
         self.setLayout(main_layout)
+
+    def reset_accumulator(self):
+        """清空已输入的分片"""
+        # 手工输入的 x-y 分片使用旧版5500位素数
+        p = Security.Primes.get_prime(Security.Primes.LEGACY_BITS)
+        self.accumulator = Security.Accumulator.ShareAccumulator(self.THRESHOLD, p)
+        for edit in self.share_edits:
+            edit.clear()
+            edit.setEnabled(True)
+        self.update_status()
+
+    def add_share(self, edit: QLineEdit):
+        """分片输入完成后立即校验并更新插值状态"""
+        text = edit.text()
+        if not text.strip() or not edit.isEnabled():
+            return
+
+        try:
+            share = parse_share_text(text)
+            if isinstance(share, dict):
+                self.accumulator.add(share)
+            else:
+                self.accumulator.add_point(*share)
+        except (ValueError, KeyError) as e:
+            QMessageBox.warning(self, "分片无效", str(e))
+            return
+
+        edit.setEnabled(False)
+        self.update_status()
+
+    def update_status(self):
+        """显示恢复进度"""
+        if self.accumulator.ready:
+            self.status_label.setText("分片已足够，可以重构秘密")
+        else:
+            self.status_label.setText(f"已接收{self.accumulator.count}个分片，还需要{self.accumulator.needed}个")
+
+    def show_secret(self):
+        """秘密在第k个分片到达时已恢复，这里只负责展示"""
+        try:
+            secret = self.accumulator.secret
+        except ValueError as e:
+            QMessageBox.warning(self, "无法重构", str(e))
+            return
+        QMessageBox.information(self, "重构成功", f"恢复的秘密（Base64）：\n{safe_b64encode(secret)}")
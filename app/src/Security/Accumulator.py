@@ -0,0 +1,177 @@
+# 增量分片累加器（在线恢复）
+# 功能点：
+# 分片逐个到达（插入U盘、持有人提交），到达时立即校验并更新牛顿差商表。
+# 第k个分片到达时只需做一次 O(k) 的更新即可得到秘密，插值开销分摊在等待分片的间隙中。
+# 超过k个的分片不再参与插值，而是用已确定的多项式检查其一致性。
+#
+# 牛顿插值：P(x) = c_0 + c_1 (x - x_0) + ... + c_m (x - x_0)...(x - x_{m-1})，c_j = f[x_0, ..., x_j]
+# 只保存差商表的最后一行 row[j] = f[x_{m-j}, ..., x_m]，新点到达时由它推出新的一行。
+
+import numpy as np
+
+import Security.GF256
+import Security.Primes
+import Security.SSS
+
+
+class ShareAccumulator:
+    """增量恢复 Shamir 秘密"""
+
+    def __init__(self, k: int, p: int = None, field: str = Security.SSS.FIELD_PRIME, key: bytes = None):
+        """
+        :param k: 恢复阈值
+        :param p: 素数域的素数，为None时按首个分片的原始长度从素数注册表中选取
+        :param field: 运算域
+        :param key: HMAC密钥
+        """
+        if k < 1:
+            raise ValueError("无效的分片参数")
+        if field not in (Security.SSS.FIELD_PRIME, Security.SSS.FIELD_GF256):
+            raise ValueError(f"不支持的运算域：{field}")
+
+        self.k = k
+        self.p = p
+        self.field = field
+        self.key = key
+        self.original_length = None
+
+        self.indices = []  # 已接受的分片索引 x_0, x_1, ...
+        self._row = []  # 差商表最后一行
+        self._coefficients = []  # 牛顿形式系数 c_j
+        self._basis = 1  # ∏(0 - x_i)，GF(2^8) 中减法即异或，为 ∏ x_i
+        self._secret = 0  # P(0) 的部分和
+
+    @property
+    def count(self) -> int:
+        """已接受的分片数量"""
+        return len(self.indices)
+
+    @property
+    def needed(self) -> int:
+        """还需要的分片数量"""
+        return max(0, self.k - self.count)
+
+    @property
+    def ready(self) -> bool:
+        """是否已能恢复秘密"""
+        return self.count >= self.k
+
+    @property
+    def secret(self) -> bytes:
+        """恢复的秘密字节"""
+        if not self.ready:
+            raise ValueError(f"分片数量不足，还需要{self.needed}个分片")
+        if self.field == Security.SSS.FIELD_GF256:
+            return self._secret.tobytes()
+
+        length = self.original_length
+        if length is None:
+            length = max(1, (self._secret.bit_length() + 7) // 8)
+        try:
+            return self._secret.to_bytes(length, 'big')
+        except OverflowError:
+            raise ValueError("恢复结果超出原始长度，分片与素数可能不匹配")
+
+    def add(self, share: dict) -> bool:
+        """
+        接收一个分片字典（Security.SSS.split_secret 的输出）
+        :param share: 分片
+        :return: 是否已能恢复秘密
+        """
+        if share.get('field', Security.SSS.FIELD_PRIME) != self.field:
+            raise ValueError("分片运算域与累加器不一致")
+        if not Security.SSS.verify_shares([share], self.key)[0]:
+            raise ValueError(f"分片 {share['index']} 校验失败")
+
+        if self.original_length is None:
+            self.original_length = share['original_length']
+        elif share['original_length'] != self.original_length:
+            raise ValueError("分片原始长度不一致，可能来自不同的分片")
+
+        return self.add_point(share['index'], share['share'])
+
+    def add_point(self, x: int, y) -> bool:
+        """
+        接收一个未带元数据的分片点 (x, y)
+        :param x: 分片索引
+        :param y: 分片值（素数域为整数，GF(2^8) 为字节串）
+        :return: 是否已能恢复秘密
+        """
+        if x in self.indices:
+            raise ValueError("分片索引重复")
+
+        if self.field == Security.SSS.FIELD_GF256:
+            if not 0 < x <= Security.GF256.MAX_SHARES:
+                raise ValueError("分片索引超出 GF(2^8) 范围")
+            y = np.frombuffer(bytes(y), dtype=np.uint8)
+            if self._row and y.size != self._row[0].size:
+                raise ValueError("分片长度不一致")
+        else:
+            if self.p is None:
+                if self.original_length is None:
+                    raise ValueError("未指定素数p且分片缺少原始长度")
+                self.p = Security.Primes.prime_for_length(self.original_length)
+            if not 0 < x < self.p:
+                raise ValueError("分片索引超出素数域范围")
+            y %= self.p
+
+        if self.ready:
+            # 多余的分片只做一致性检查
+            if not self._consistent(x, y):
+                raise ValueError(f"分片 {x} 与已恢复的多项式不一致")
+            return True
+
+        if self.field == Security.SSS.FIELD_GF256:
+            self._update_gf256(x, y)
+        else:
+            self._update_prime(x, y)
+        self.indices.append(x)
+        return self.ready
+
+    def _update_prime(self, x: int, y: int):
+        p = self.p
+        m = len(self.indices)
+        # 新一行的分母 x - x_{m-j}（j = 1..m）事先已知，一次批量求逆
+        inverses = Security.SSS.batch_inverse([(x - self.indices[m - j]) % p for j in range(1, m + 1)], p)
+
+        row = [y]
+        for j in range(1, m + 1):
+            row.append((row[j - 1] - self._row[j - 1]) * inverses[j - 1] % p)
+        self._row = row
+
+        c = row[m]
+        self._coefficients.append(c)
+        self._secret = (self._secret + c * self._basis) % p
+        self._basis = self._basis * -x % p
+
+    def _update_gf256(self, x: int, y: np.ndarray):
+        mul = Security.GF256.MUL
+        m = len(self.indices)
+
+        row = [y]
+        for j in range(1, m + 1):
+            inverse = Security.GF256.gf_inv(x ^ self.indices[m - j])
+            row.append(mul[inverse, row[j - 1] ^ self._row[j - 1]])
+        self._row = row
+
+        c = row[m]
+        self._coefficients.append(c)
+        if m == 0:
+            self._secret = c.copy()
+        else:
+            self._secret = self._secret ^ mul[self._basis, c]
+        self._basis = Security.GF256.gf_mul(self._basis, x)
+
+    def _consistent(self, x: int, y) -> bool:
+        """按牛顿形式求 P(x) 并与 y 比较"""
+        if self.field == Security.SSS.FIELD_GF256:
+            mul = Security.GF256.MUL
+            value = self._coefficients[-1]
+            for c, xi in zip(reversed(self._coefficients[:-1]), reversed(self.indices[:-1])):
+                value = mul[x ^ xi, value] ^ c
+            return bool(np.array_equal(value, y))
+
+        value = self._coefficients[-1]
+        for c, xi in zip(reversed(self._coefficients[:-1]), reversed(self.indices[:-1])):
+            value = (value * (x - xi) + c) % self.p
+        return value == y
@@ -0,0 +1,67 @@
+# 大整数运算后端
+# 功能点：
+# 安装了 gmpy2 时使用 GMP 的 mpz 做模乘、取模与求逆，未安装时退回 Python 内置 int。
+# 两种后端的计算结果完全相同，分片输出始终转换回内置 int，可在运行时切换以便对比测试。
+
+import contextlib
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+BACKEND_PYTHON = 'python'  # Python 内置 int
+BACKEND_GMPY2 = 'gmpy2'  # GMP mpz
+
+_active = BACKEND_GMPY2 if gmpy2 is not None else BACKEND_PYTHON
+
+
+def available_backends() -> list:
+    """当前环境可用的后端"""
+    return [BACKEND_PYTHON] + ([BACKEND_GMPY2] if gmpy2 is not None else [])
+
+
+def get_backend() -> str:
+    """当前使用的后端"""
+    return _active
+
+
+def set_backend(name: str):
+    """
+    切换后端
+    :param name: BACKEND_PYTHON 或 BACKEND_GMPY2
+    """
+    global _active
+    if name not in available_backends():
+        raise ValueError(f"不可用的大整数后端：{name}")
+    _active = name
+
+
+@contextlib.contextmanager
+def use_backend(name: str):
+    """在 with 块内临时使用指定后端"""
+    previous = get_backend()
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+def to_number(value: int):
+    """转换为当前后端的整数类型"""
+    if _active == BACKEND_GMPY2:
+        return gmpy2.mpz(value)
+    return value
+
+
+def to_int(value) -> int:
+    """转换回 Python 内置 int"""
+    return int(value)
+
+
+def invert(value, p):
+    """模逆元"""
+    if _active == BACKEND_GMPY2:
+        return gmpy2.invert(value, p)
+    return pow(value, -1, p)
@@ -2,92 +2,234 @@
 # 功能点：
 # RSA 密钥对生成：使用安全库（如 cryptography）生成符合标准的密钥对。
 import base64
-import hashlib
+import io
 import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import gmssl
 from cryptography.exceptions import InvalidKey, UnsupportedAlgorithm
 
 import Log.LoginLogger
+import Security.Password
+import Security.SM4
 
-from cryptography.fernet import Fernet
-
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.asymmetric import x25519
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.exceptions import InvalidTag
 
 CWD = os.getcwd()
 
 PUBLIC_KEY_PATH = f'{CWD}/key/key.pub'
 PRIVATE_KEY_PATH = f'{CWD}/key/key'
 
+RSA_KEY_SIZE = 1024
+
+# X25519 密钥：私钥即 32 字节标量，分片时只需 257 位素数域（或 GF(2^8)），分片可打印为单个二维码
+X25519_PRIVATE_KEY_PATH = f'{CWD}/key/x25519'
+X25519_PUBLIC_KEY_PATH = f'{CWD}/key/x25519.pub'
+X25519_KEY_SIZE = 32
+
+# ECIES 密文格式：版本(1) | 临时公钥(32) | AES-256-GCM 密文 + 标签(16)
+# 每条消息的临时密钥不同，由 HKDF 派生的对称密钥也不同，因此使用固定随机数
+ECIES_VERSION = 1
+ECIES_INFO = b'ProjectVault ECIES X25519 AES-256-GCM'
+_ECIES_NONCE = bytes(12)
+
+# 信封加密格式：
+#   文件头：魔数(4) | 版本(1) | 块大小(4) | 封装密钥长度(2) | RSA-OAEP 封装的数据密钥 | 随机数前缀(7)
+#   数据块：AES-256-GCM 密文 + 16 字节认证标签，明文块大小固定，最后一块可更短（可为空）
+# 每块随机数 = 前缀(7) | 块序号(4) | 末块标志(1)（STREAM 构造），文件头作为每块的附加认证数据，
+# 块被删除、重排、截断或文件头被改动都会导致认证失败。
+ENVELOPE_MAGIC = b'PVEN'
+ENVELOPE_VERSION = 1
+ENVELOPE_CHUNK_SIZE = 64 * 1024
+ENVELOPE_KEY_SIZE = 32
+ENVELOPE_NONCE_PREFIX_SIZE = 7
+ENVELOPE_TAG_SIZE = 16
+
+# 已解析密钥缓存：路径 -> ((mtime_ns, inode, size), 密钥对象)
+# 文件被替换或改写后签名变化，下次使用时重新解析；锁定/注销时调用 Asymmetric.evict_keys 清空
+_key_cache = {}
+_key_cache_lock = threading.Lock()
+
+# 批量加解密的默认线程数：基准测试（test/Benchmark.py 的 crypto.decrypt_many[64]）中多线程没有比顺序执行更快，
+# 默认顺序执行；在多核主机上实测有收益时再按调用或在此调大
+BATCH_WORKERS = 1
+
+# 列加密格式：版本(1) | 随机数(12) | AES-256-GCM 密文 + 标签(16)
+# 附加认证数据为列名与行标识（如用户ID与令牌名），密文被复制到其他行或其他列时认证失败
+COLUMN_VERSION = 1
+COLUMN_KEY_SIZE = 32
+COLUMN_NONCE_SIZE = 12
+
+_ENVELOPE_HEADER = struct.Struct('>4sBIH')
+_ENVELOPE_NONCE = struct.Struct(f'>{ENVELOPE_NONCE_PREFIX_SIZE}sIB')
+
 
 
 class Hash:
 
+    @staticmethod
     def generate_password_hash(password: str) -> str:
-        salt = Fernet.generate_key()
-        # 设定一个password，接着使用PBKDF2HMAC。
-        # 它是个密钥推导函数，通过多次对salt进行hash运算从而产生密钥。
-        return hashlib.pbkdf2_hmac(
-            'sha256',
-            password.encode('utf-8'),
-            salt,
-            100000
-        ).hex()
+        """口令哈希（算法与参数见 Security.Password，结果含盐与参数，可用 verify_password 验证）"""
+        return Security.Password.hash_password(password)
+
+    @staticmethod
+    def verify_password(password: str, password_hash: str):
+        """验证口令，返回 (是否正确, 升级后的新哈希或None)"""
+        return Security.Password.verify_password(password, password_hash)
 
 class Symmetric:
+    """对称加解密；需要由口令派生的密钥时使用 Security.KeyHierarchy.subkey，不在此处单独拉伸口令"""
 
+    @staticmethod
+    def aes_encryption(data: bytes, key: bytes, aad: bytes = None) -> bytes:
+        """
+        AES-GCM加密
+        :param data: 明文字节
+        :param key: 16、24或32字节密钥
+        :param aad: 附加认证数据
+        :return: 随机数(12) | 密文 + 标签
+        """
+        nonce = os.urandom(COLUMN_NONCE_SIZE)
+        return nonce + AESGCM(key).encrypt(nonce, data, aad)
 
-    def aes_encryption(self):
-        pass
+    @staticmethod
+    def aes_decryption(encrypted_data: bytes, key: bytes, aad: bytes = None) -> bytes:
+        """
+        AES-GCM解密
+        :param encrypted_data: aes_encryption 生成的密文
+        :param key: 加密时使用的密钥
+        :param aad: 附加认证数据（须与加密时一致）
+        :return: 明文字节
+        """
+        try:
+            return AESGCM(key).decrypt(encrypted_data[:COLUMN_NONCE_SIZE],
+                                       encrypted_data[COLUMN_NONCE_SIZE:], aad)
+        except InvalidTag as e:
+            raise ValueError("解密失败：密钥不匹配或密文已损坏") from e
 
 
-    # 密码
-    password = b"password"
-    # 盐
-    salt = b"salt"
+    @staticmethod
+    def sm4_encryption(data: bytes, key: bytes, mode: str = Security.SM4.MODE_GCM, aad: bytes = None) -> bytes:
+        """
+        SM4加密（默认 GCM 认证模式，大数据请用 Security.SM4.encrypt_stream）
+        :param data: 明文字节
+        :param key: 16字节密钥
+        :param mode: Security.SM4.MODE_GCM 或 Security.SM4.MODE_CTR
+        :param aad: 附加认证数据（仅 GCM）
+        :return: 密文字节
+        """
+        return Security.SM4.encrypt(data, key, mode, aad)
 
-    # 创建PBKDF2HMAC对象
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=100000,
-        backend=default_backend()
-    )
+    @staticmethod
+    def sm4_decryption(encrypted_data: bytes, key: bytes, aad: bytes = None) -> bytes:
+        """
+        SM4解密
+        :param encrypted_data: sm4_encryption 生成的密文
+        :param key: 16字节密钥
+        :param aad: 附加认证数据（仅 GCM，须与加密时一致）
+        :return: 明文字节
+        """
+        return Security.SM4.decrypt(encrypted_data, key, aad)
 
-    # 派生密钥
-    key = kdf.derive(password)
 
+class ColumnCipher:
+    """数据库列加密（AES-256-GCM），密钥调度只在创建时做一次"""
 
-    def sm4_encryption(self):
-        pass
+    __slots__ = ('_aead',)
 
+    def __init__(self, data_key: bytes):
+        """
+        :param data_key: 32字节数据密钥（见 Asymmetric.unwrap_data_key）
+        """
+        if len(data_key) != COLUMN_KEY_SIZE:
+            raise ValueError(f"数据密钥长度必须为{COLUMN_KEY_SIZE}字节")
+        self._aead = AESGCM(data_key)
 
+    @staticmethod
+    def generate_data_key() -> bytes:
+        """生成数据密钥"""
+        return AESGCM.generate_key(bit_length=COLUMN_KEY_SIZE * 8)
 
+    @staticmethod
+    def context(column: str, *row) -> bytes:
+        """
+        构造附加认证数据
+        :param column: 列名，如 'tokens.token_value'
+        :param row: 行标识，如 (用户ID, 令牌名)
+        """
+        return '\x1f'.join([column, *map(str, row)]).encode('utf-8')
+
+    @staticmethod
+    def is_ciphertext(blob: bytes) -> bool:
+        """
+        是否为列密文格式（版本字节不是可打印字符，旧版明文列值不会被误判）
+        :param blob: 列值
+        """
+        return len(blob) >= 1 + COLUMN_NONCE_SIZE + 16 and blob[0] == COLUMN_VERSION
+
+    def encrypt(self, value: str, context: bytes) -> bytes:
+        """
+        加密一个列值
+        :param value: 明文字符串
+        :param context: 附加认证数据（见 ColumnCipher.context）
+        :return: 可直接写入 VARBINARY 列的密文
+        """
+        nonce = os.urandom(COLUMN_NONCE_SIZE)
+        return bytes([COLUMN_VERSION]) + nonce + self._aead.encrypt(nonce, value.encode('utf-8'), context)
+
+    def decrypt(self, blob: bytes, context: bytes) -> str:
+        """
+        解密一个列值
+        :param blob: 列中的密文
+        :param context: 附加认证数据（须与加密时一致）
+        :return: 明文字符串
+        """
+        blob = bytes(blob)
+        if not ColumnCipher.is_ciphertext(blob):
+            raise ValueError("不是有效的列密文")
+        try:
+            plain = self._aead.decrypt(blob[1:1 + COLUMN_NONCE_SIZE], blob[1 + COLUMN_NONCE_SIZE:], context)
+        except InvalidTag as e:
+            raise ValueError("解密失败：数据密钥不匹配或密文已损坏") from e
+        return plain.decode('utf-8')
+
+    def decrypt_many(self, items: list) -> list:
+        """
+        批量解密（导出用）
+        :param items: [(密文, 附加认证数据), ...]
+        :return: 与 items 顺序一致的 (明文, 错误) 列表，单项失败不影响其他项
+        """
+        # AES-GCM 单项只需微秒级，线程调度开销反而更大，顺序执行
+        return _run_batch(lambda item: self.decrypt(*item), items, workers=1)
 
 
 class Asymmetric:
 
     @staticmethod
-    def rsa_keygen(user: str):
+    def rsa_keygen(user: str, private_key=None):
 
-        """生成并保存RSA密钥对到指定路径"""
+        """
+        生成并保存RSA密钥对到指定路径
+        :param private_key: 已生成的私钥（如来自 Security.KeyPool），为None时当场生成
+        """
 
         try:
 
             os.makedirs(os.path.dirname(PRIVATE_KEY_PATH), exist_ok=True)
 
             # 生成私钥
-            private_key = rsa.generate_private_key(
-                public_exponent=65537,
-                key_size=1024,
-                backend=default_backend(),
-            )
+            if private_key is None:
+                private_key = Asymmetric.generate_private_key()
 
             # 序列化私钥（PKCS8格式，无加密）
             private_pem = private_key.private_bytes(
@@ -96,7 +238,8 @@ class Asymmetric:
                 encryption_algorithm=serialization.NoEncryption()
             )
 
-            # 保存私钥
+            # 保存私钥（旧密钥的缓存作废）
+            Asymmetric.evict_keys()
             with open(PRIVATE_KEY_PATH, "wb") as f:
                 f.write(private_pem)
 
@@ -121,15 +264,23 @@ class Asymmetric:
             Log.LoginLogger.user_key_generation_log(f"密钥生成失败: {str(e)}")
             return False
 
+    @staticmethod
+    def generate_private_key(key_size: int = RSA_KEY_SIZE):
+        """生成RSA私钥（素数搜索耗时较长，界面中应通过 Security.KeyPool 在后台获取）"""
+        return rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=key_size,
+            backend=default_backend(),
+        )
+
     @staticmethod
     def load_public_key():
-        """从文件系统加载公钥"""
+        """从文件系统加载公钥（文件未变化时使用缓存）"""
         try:
-            with open(PUBLIC_KEY_PATH, "rb") as key_file:
-                return serialization.load_pem_public_key(
-                    key_file.read(),
-                    backend=default_backend()
-                )
+            return _load_cached_key(PUBLIC_KEY_PATH, lambda data: serialization.load_pem_public_key(
+                data,
+                backend=default_backend()
+            ))
         except FileNotFoundError:
             raise FileNotFoundError(f"公钥文件未找到：{PUBLIC_KEY_PATH}")
         except Exception as e:
@@ -137,19 +288,24 @@ class Asymmetric:
 
     @staticmethod
     def load_private_key():
-        """从文件系统加载私钥"""
+        """从文件系统加载私钥（文件未变化时使用缓存）"""
         try:
-            with open(PRIVATE_KEY_PATH, "rb") as key_file:
-                return serialization.load_pem_private_key(
-                    key_file.read(),
-                    password=None,  # 与密钥生成时的加密设置保持一致
-                    backend=default_backend()
-                )
+            return _load_cached_key(PRIVATE_KEY_PATH, lambda data: serialization.load_pem_private_key(
+                data,
+                password=None,  # 与密钥生成时的加密设置保持一致
+                backend=default_backend()
+            ))
         except FileNotFoundError:
             raise FileNotFoundError(f"私钥文件未找到：{PRIVATE_KEY_PATH}")
         except Exception as e:
             raise RuntimeError(f"私钥加载失败：{str(e)}") from e
 
+    @staticmethod
+    def evict_keys():
+        """清空已解析密钥缓存（锁定、注销时调用）"""
+        with _key_cache_lock:
+            _key_cache.clear()
+
     @staticmethod
     def rsa_encryption(msg: str) -> bytes:
         """
@@ -193,6 +349,386 @@ class Asymmetric:
         except (UnsupportedAlgorithm, InvalidKey) as e:
             raise ValueError("解密失败：密钥或填充参数不正确") from e
 
+    @staticmethod
+    def x25519_keygen(user: str, private_key: x25519.X25519PrivateKey = None):
+        """
+        生成并保存X25519密钥对（私钥、公钥均为32字节原始格式）
+        :param private_key: 已有私钥（如由分片恢复），为None时生成新私钥
+        """
+        try:
+            os.makedirs(os.path.dirname(X25519_PRIVATE_KEY_PATH), exist_ok=True)
+            if private_key is None:
+                private_key = x25519.X25519PrivateKey.generate()
+
+            private_raw = private_key.private_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PrivateFormat.Raw,
+                encryption_algorithm=serialization.NoEncryption()
+            )
+            public_raw = private_key.public_key().public_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PublicFormat.Raw
+            )
+
+            Asymmetric.evict_keys()
+            with open(X25519_PRIVATE_KEY_PATH, "wb") as f:
+                f.write(private_raw)
+            with open(X25519_PUBLIC_KEY_PATH, "wb") as f:
+                f.write(public_raw)
+
+            Log.LoginLogger.user_key_generation_log(user)
+            return True
+
+        except Exception as e:
+            Log.LoginLogger.user_key_generation_log(f"密钥生成失败: {str(e)}")
+            return False
+
+    @staticmethod
+    def load_x25519_private_key() -> x25519.X25519PrivateKey:
+        """从文件系统加载X25519私钥（文件未变化时使用缓存）"""
+        try:
+            return _load_cached_key(X25519_PRIVATE_KEY_PATH, x25519.X25519PrivateKey.from_private_bytes)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"私钥文件未找到：{X25519_PRIVATE_KEY_PATH}")
+        except Exception as e:
+            raise RuntimeError(f"私钥加载失败：{str(e)}") from e
+
+    @staticmethod
+    def load_x25519_public_key() -> x25519.X25519PublicKey:
+        """从文件系统加载X25519公钥（文件未变化时使用缓存）"""
+        try:
+            return _load_cached_key(X25519_PUBLIC_KEY_PATH, x25519.X25519PublicKey.from_public_bytes)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"公钥文件未找到：{X25519_PUBLIC_KEY_PATH}")
+        except Exception as e:
+            raise RuntimeError(f"公钥加载失败：{str(e)}") from e
+
+    @staticmethod
+    def x25519_private_bytes(private_key: x25519.X25519PrivateKey = None) -> bytes:
+        """
+        取出X25519私钥的32字节标量（用于分片）
+        :param private_key: 私钥，为None时从文件加载
+        """
+        if private_key is None:
+            private_key = Asymmetric.load_x25519_private_key()
+        return private_key.private_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PrivateFormat.Raw,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+
+    @staticmethod
+    def ecies_encryption(msg: str) -> bytes:
+        """
+        ECIES加密：临时X25519密钥与接收方公钥协商，HKDF派生密钥后用AES-GCM加密，长度不受限制
+        :param msg: 要加密的明文消息（字符串）
+        :return: 加密后的密文（字节）
+        """
+        public_key = Asymmetric.load_x25519_public_key()
+        ephemeral = x25519.X25519PrivateKey.generate()
+        ephemeral_raw = ephemeral.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        key = _ecies_key(ephemeral.exchange(public_key), ephemeral_raw, public_key)
+        return bytes([ECIES_VERSION]) + ephemeral_raw + AESGCM(key).encrypt(_ECIES_NONCE, msg.encode('utf-8'), None)
+
+    @staticmethod
+    def ecies_decryption(encrypted_data: bytes) -> str:
+        """
+        ECIES解密
+        :param encrypted_data: 要解密的密文（字节）
+        :return: 解密后的明文（字符串）
+        """
+        if len(encrypted_data) < 1 + X25519_KEY_SIZE + ENVELOPE_TAG_SIZE or encrypted_data[0] != ECIES_VERSION:
+            raise ValueError("解密失败：不是有效的ECIES密文")
+        ephemeral_raw = encrypted_data[1:1 + X25519_KEY_SIZE]
+
+        private_key = Asymmetric.load_x25519_private_key()
+        try:
+            shared = private_key.exchange(x25519.X25519PublicKey.from_public_bytes(ephemeral_raw))
+            key = _ecies_key(shared, ephemeral_raw, private_key.public_key())
+            decrypted = AESGCM(key).decrypt(_ECIES_NONCE, encrypted_data[1 + X25519_KEY_SIZE:], None)
+        except (InvalidTag, ValueError) as e:
+            raise ValueError("解密失败：密钥不匹配或密文已损坏") from e
+        return decrypted.decode('utf-8')
+
+    @staticmethod
+    def encrypt_many(messages: list, workers: int = None) -> list:
+        """
+        批量RSA加密：共用一次加载的公钥，默认顺序运算
+        :param messages: 明文字符串列表
+        :param workers: 线程数，为None时使用 BATCH_WORKERS
+        :return: 与 messages 顺序一致的 (密文, 错误) 列表，成功时错误为None，失败时密文为None
+        """
+        public_key = Asymmetric.load_public_key()
+        return _run_batch(lambda msg: public_key.encrypt(msg.encode('utf-8'), _envelope_oaep()),
+                          messages, workers)
+
+    @staticmethod
+    def decrypt_many(ciphers: list, workers: int = None) -> list:
+        """
+        批量RSA解密：共用一次加载的私钥，默认顺序运算
+        :param ciphers: 密文列表
+        :param workers: 线程数，为None时使用 BATCH_WORKERS
+        :return: 与 ciphers 顺序一致的 (明文, 错误) 列表，成功时错误为None，失败时明文为None
+        """
+        private_key = Asymmetric.load_private_key()
+        return _run_batch(lambda cipher: private_key.decrypt(cipher, _envelope_oaep()).decode('utf-8'),
+                          ciphers, workers)
+
+    @staticmethod
+    def wrap_data_key(data_key: bytes) -> bytes:
+        """
+        用RSA公钥封装数据密钥，封装结果可保存到数据库
+        :param data_key: 数据密钥
+        :return: RSA-OAEP 密文
+        """
+        return Asymmetric.load_public_key().encrypt(data_key, _envelope_oaep())
+
+    @staticmethod
+    def unwrap_data_key(wrapped_key: bytes) -> bytes:
+        """
+        用RSA私钥解封数据密钥（每个会话只需一次，见 Service.Session）
+        :param wrapped_key: wrap_data_key 的结果
+        :return: 数据密钥
+        """
+        try:
+            return Asymmetric.load_private_key().decrypt(bytes(wrapped_key), _envelope_oaep())
+        except ValueError as e:
+            raise ValueError("数据密钥解封失败：私钥不匹配或封装已损坏") from e
+
+    @staticmethod
+    def envelope_encryption(source, sink=None, chunk_size: int = ENVELOPE_CHUNK_SIZE):
+        """
+        信封加密：随机数据密钥经 RSA 公钥封装一次，载荷按块做 AES-GCM 加密
+        :param source: bytes、文件路径、二进制流或 bytes 迭代器
+        :param sink: 文件路径或可写二进制流；为None时返回密文字节
+        :param chunk_size: 明文块大小
+        :return: 密文字节，或写入的字节数
+        """
+        if not 0 < chunk_size < 1 << 32:
+            raise ValueError("无效的块大小")
+
+        data_key = AESGCM.generate_key(bit_length=ENVELOPE_KEY_SIZE * 8)
+        try:
+            wrapped_key = Asymmetric.load_public_key().encrypt(data_key, _envelope_oaep())
+        except (UnsupportedAlgorithm, InvalidKey) as e:
+            raise ValueError("加密失败：密钥或填充参数不正确") from e
+
+        prefix = os.urandom(ENVELOPE_NONCE_PREFIX_SIZE)
+        header = (_ENVELOPE_HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION, chunk_size, len(wrapped_key))
+                  + wrapped_key + prefix)
+        aead = AESGCM(data_key)
+
+        def pieces():
+            yield header
+            for counter, (chunk, last) in enumerate(_iter_with_last(_iter_chunks(source, chunk_size))):
+                nonce = _ENVELOPE_NONCE.pack(prefix, counter, last)
+                yield aead.encrypt(nonce, bytes(chunk), header)
+
+        return _write_output(sink, pieces())
+
+    @staticmethod
+    def envelope_decryption(source, sink=None):
+        """
+        信封解密：RSA 私钥解封数据密钥一次，逐块认证并解密
+        :param source: bytes、文件路径、二进制流或 bytes 迭代器（envelope_encryption 的输出）
+        :param sink: 文件路径或可写二进制流；为None时返回明文字节
+        :return: 明文字节，或写入的字节数
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                return Asymmetric.envelope_decryption(f, sink)
+        stream = _as_stream(source)
+
+        fixed = _read_exact(stream, _ENVELOPE_HEADER.size)
+        magic, version, chunk_size, key_length = _ENVELOPE_HEADER.unpack(fixed)
+        if magic != ENVELOPE_MAGIC or version != ENVELOPE_VERSION:
+            raise ValueError("不是有效的信封密文")
+        rest = _read_exact(stream, key_length + ENVELOPE_NONCE_PREFIX_SIZE)
+        wrapped_key, prefix = rest[:key_length], rest[key_length:]
+        header = fixed + rest
+
+        try:
+            data_key = Asymmetric.load_private_key().decrypt(wrapped_key, _envelope_oaep())
+        except (UnsupportedAlgorithm, InvalidKey, ValueError) as e:
+            raise ValueError("解密失败：数据密钥无法解封") from e
+        aead = AESGCM(data_key)
+
+        def pieces():
+            blocks = _iter_chunks(stream, chunk_size + ENVELOPE_TAG_SIZE)
+            for counter, (block, last) in enumerate(_iter_with_last(blocks)):
+                nonce = _ENVELOPE_NONCE.pack(prefix, counter, last)
+                try:
+                    yield aead.decrypt(nonce, bytes(block), header)
+                except InvalidTag:
+                    raise ValueError(f"第{counter}块认证失败，密文已损坏或被截断")
+
+        return _write_output(sink, pieces())
+
+
+
+def _load_cached_key(path: str, parse):
+    """
+    读取并解析密钥文件，文件的 mtime、inode、大小均未变化时直接返回缓存的密钥对象
+    :param path: 密钥文件路径
+    :param parse: 由文件内容解析密钥对象的函数
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_ino, st.st_size)
+    with _key_cache_lock:
+        entry = _key_cache.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+    # 解析在锁外进行，避免阻塞其他线程；并发未命中时最多重复解析一次
+    with open(path, "rb") as key_file:
+        key = parse(key_file.read())
+    with _key_cache_lock:
+        _key_cache[path] = (stamp, key)
+    return key
+
+
+def _run_batch(func, items: list, workers: int = None) -> list:
+    """
+    逐项执行 func（workers 大于1时使用线程池），单项异常不影响其他项
+    :param workers: 线程数，为None时使用 BATCH_WORKERS
+    :return: 与 items 顺序一致的 (结果, 错误) 列表
+    """
+    def call(item):
+        try:
+            return func(item), None
+        except Exception as e:
+            return None, e
+
+    if workers is None:
+        workers = BATCH_WORKERS
+    workers = max(1, min(workers, len(items)))
+    if workers == 1:
+        return [call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(call, items))
+
+
+def _ecies_key(shared: bytes, ephemeral_raw: bytes, public_key: x25519.X25519PublicKey) -> bytes:
+    """由共享秘密派生 AES-256 密钥，双方公钥计入 info，防止密文被转用到其他密钥对"""
+    recipient_raw = public_key.public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
+    )
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=ECIES_INFO + ephemeral_raw + recipient_raw,
+    ).derive(shared)
+
+
+def _envelope_oaep():
+    return padding.OAEP(
+        mgf=padding.MGF1(algorithm=hashes.SHA256()),
+        algorithm=hashes.SHA256(),
+        label=None
+    )
+
+
+def _iter_chunks(source, size: int):
+    """
+    把输入按固定大小重新分块
+    :param source: bytes、文件路径、二进制流或 bytes 迭代器
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), size):
+            yield view[offset:offset + size]
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from _iter_chunks(f, size)
+        return
+
+    if hasattr(source, 'read'):
+        while True:
+            chunk = source.read(size)
+            if not chunk:
+                return
+            while len(chunk) < size:
+                more = source.read(size - len(chunk))
+                if not more:
+                    break
+                chunk += more
+            yield chunk
+        return
+
+    buffer = bytearray()
+    for piece in source:
+        buffer += piece
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _iter_with_last(chunks):
+    """逐块产出 (块, 是否末块)，输入为空时产出一个空的末块"""
+    previous = None
+    for chunk in chunks:
+        if previous is not None:
+            yield previous, False
+        previous = chunk
+    yield (previous if previous is not None else b''), True
+
+
+class _IterableReader:
+    """把 bytes 迭代器包装为只读流"""
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self._buffer = bytearray()
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            piece = next(self._iterator, None)
+            if piece is None:
+                break
+            self._buffer += piece
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def _as_stream(source):
+    """bytes、二进制流或 bytes 迭代器统一为带 read 的流"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, 'read'):
+        return source
+    return _IterableReader(source)
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("密文不完整")
+    return data
+
+
+def _write_output(sink, pieces) -> bytes | int:
+    """sink 为None时返回拼接的字节，否则写入文件路径或可写流并返回写入字节数"""
+    if sink is None:
+        return b''.join(pieces)
+    if isinstance(sink, (str, os.PathLike)):
+        with open(sink, 'wb') as f:
+            return _write_output(f, pieces)
+    total = 0
+    for piece in pieces:
+        sink.write(piece)
+        total += len(piece)
+    return total
+
 
 class Coding:
     @staticmethod
@@ -0,0 +1,152 @@
+# 信息分散混合模式（Krawczyk 的短分片秘密共享）
+# 功能点：
+# 载荷用一次性 AES-256-GCM 密钥加密，密文经 Rabin 信息分散（GF(2^8) 范德蒙德编码）切成 n 个分片，
+# 每个分片约为 |载荷| / k；只有 32 字节的密钥在 GF(2^8) 上做 Shamir 分片，随各分片一起保存。
+# 任意 k 个分片即可还原载荷，每个存储介质的读写量约降为原来的 1/k。
+# 少于 k 个分片既得不到密钥，也得不到完整密文；GCM 认证标签保证还原结果未被篡改。
+#
+# 分片文件布局（大端序）：
+#   魔数(4) | 版本(1) | 索引(2) | 阈值(2) | 密文长度(8) | 随机数(12) | 密钥分片(32) | 密文分片(变长) | 标签(32)
+# 标签为 SHA-256，提供 HMAC 密钥时为 HMAC-SHA256。
+
+import hashlib
+import hmac
+import os
+import struct
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+import Security.GF256
+
+MAGIC = b'PVID'
+VERSION = 1
+
+KEY_SIZE = 32
+NONCE_SIZE = 12
+
+_HEADER = struct.Struct(f'>4sBHHQ{NONCE_SIZE}s')
+_TAG_SIZE = hashlib.sha256().digest_size
+
+
+def _tag(body, key: bytes = None) -> bytes:
+    if key is None:
+        return hashlib.sha256(body).digest()
+    return hmac.digest(key, body, hashlib.sha256)
+
+
+def disperse(payload: bytes, n: int, k: int, key: bytes = None) -> list:
+    """
+    分散载荷
+    :param payload: 待分散的载荷（如导出的密码库）
+    :param n: 分片数量（不超过255）
+    :param k: 恢复阈值
+    :param key: HMAC密钥，给出时分片标签为 HMAC-SHA256
+    :return: n 个分片文件内容（bytes），顺序对应索引 1..n
+    """
+    data_key = AESGCM.generate_key(bit_length=KEY_SIZE * 8)
+    nonce = os.urandom(NONCE_SIZE)
+    ciphertext = AESGCM(data_key).encrypt(nonce, payload, None)
+
+    key_shares = Security.GF256.split_bytes(data_key, n, k)
+    fragments = Security.GF256.disperse_bytes(ciphertext, n, k)
+
+    shares = []
+    for (x, key_share), (_, fragment) in zip(key_shares, fragments):
+        body = _HEADER.pack(MAGIC, VERSION, x, k, len(ciphertext), nonce) + key_share + fragment
+        shares.append(body + _tag(body, key))
+    return shares
+
+
+def parse(data, key: bytes = None) -> dict:
+    """
+    解析并校验分片文件
+    :param data: 分片文件内容
+    :param key: HMAC密钥
+    :return: 分片字段字典，key_share/fragment 为原始缓冲区上的 memoryview
+    """
+    view = memoryview(data)
+    if len(view) < _HEADER.size + KEY_SIZE + _TAG_SIZE:
+        raise ValueError("分片数据过短")
+    if not hmac.compare_digest(_tag(view[:-_TAG_SIZE], key), view[-_TAG_SIZE:]):
+        raise ValueError("分片标签校验失败")
+
+    magic, version, index, k, length, nonce = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("不是有效的分散分片")
+
+    body = view[_HEADER.size:-_TAG_SIZE]
+    return {
+        'index': index,
+        'threshold': k,
+        'length': length,
+        'nonce': nonce,
+        'key_share': body[:KEY_SIZE],
+        'fragment': body[KEY_SIZE:]
+    }
+
+
+def reconstruct(shares: list, key: bytes = None) -> bytes:
+    """
+    由任意 k 个分片还原载荷，校验失败或来自其他批次的分片被跳过
+    :param shares: 分片文件内容列表
+    :param key: HMAC密钥，分片使用 HMAC 标签时必须提供
+    :return: 载荷
+    """
+    parsed = []
+    for data in shares:
+        try:
+            share = parse(data, key)
+        except ValueError:
+            continue  # 跳过无效分片
+        if parsed and (share['threshold'], share['length'], share['nonce']) != \
+                (parsed[0]['threshold'], parsed[0]['length'], parsed[0]['nonce']):
+            continue  # 跳过来自其他批次的分片
+        if any(share['index'] == s['index'] for s in parsed):
+            continue
+        parsed.append(share)
+
+    if not parsed or len(parsed) < parsed[0]['threshold']:
+        raise ValueError("有效分片数量不足")
+    first = parsed[0]
+    parsed = parsed[:first['threshold']]
+
+    data_key = Security.GF256.recover_bytes([(s['index'], s['key_share']) for s in parsed])
+    ciphertext = Security.GF256.gather_bytes([(s['index'], s['fragment']) for s in parsed], first['length'])
+    try:
+        return AESGCM(data_key).decrypt(first['nonce'], ciphertext, None)
+    except InvalidTag:
+        raise ValueError("载荷认证失败，分片可能已损坏")
+
+
+def disperse_file(path: str, sinks: list, k: int, key: bytes = None) -> int:
+    """
+    分散文件并写入各分片文件
+    :param path: 载荷文件路径
+    :param sinks: n 个分片文件路径
+    :param k: 恢复阈值
+    :return: 每个分片文件的字节数
+    """
+    with open(path, 'rb') as f:
+        shares = disperse(f.read(), len(sinks), k, key)
+    for sink, share in zip(sinks, shares):
+        with open(sink, 'wb') as f:
+            f.write(share)
+    return len(shares[0]) if shares else 0
+
+
+def reconstruct_file(sources: list, path: str, key: bytes = None) -> int:
+    """
+    从分片文件还原载荷文件
+    :param sources: 至少 k 个分片文件路径
+    :param path: 输出路径
+    :return: 载荷字节数
+    """
+    shares = []
+    for source in sources:
+        with open(source, 'rb') as f:
+            shares.append(f.read())
+    payload = reconstruct(shares, key)
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return len(payload)
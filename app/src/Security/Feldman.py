@@ -0,0 +1,247 @@
+# Feldman 可验证秘密分片
+# 功能点：
+# 分片时公布多项式系数的承诺 C_j = g^{a_j} mod q，持有人可验证 g^y == ∏ C_j^{x^j}，
+# 即分片确实来自所承诺的多项式（SHA-256 标签只能证明分片生成后未被修改）。
+# 群取 RFC 3526 的 2048 位 MODP 群（安全素数 q），g = 4 生成 r = (q-1)/2 阶的二次剩余子群，
+# Shamir 分片在 Z_r 上进行，秘密最长 255 字节。注意承诺 C_0 = g^s 会公开 g^s，秘密应为高熵密钥。
+# 任意长度的载荷（如 Recovery.RecoveryInterface 分片的 PEM/DER 私钥）使用混合模式 split_payload：
+# 与 Security.Dispersal 相同，只对随机的 32 字节种子做可验证分片，载荷以由种子经 HKDF 派生的
+# AES-256-GCM 密钥加密，密文与承诺一同公开保存，承诺作为附加认证数据，承诺被替换时解密失败。
+# Recovery.RecoveryInterface.split_private_key_verifiable 使用该模式；恢复界面手工输入的 x-y 分片没有承诺，
+# 仍只能做 Security.SSS.verify_shares 的标签校验。
+#
+# 性能：
+# 生成元 g 固定，预先计算窗口表 g^(d·2^(w·i))，一次求幂只需约 2048/w 次模乘，无需平方。
+# 批量验证使用随机线性组合：取随机 ρ_i，检查 g^{Σρ_i y_i} == ∏ C_j^{Σρ_i x_i^j}，
+# 只需一次固定基求幂与 k 次小指数求幂，验证全部 n 个分片的开销与验证一个相当；
+# 批量验证失败时再逐个验证，找出错误分片。
+
+import functools
+import hashlib
+import os
+import secrets
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+import Security.SSS
+
+# RFC 3526 第 14 组：q = 2^2048 - 2^1984 - 1 + 2^64 * (floor(2^1918 * pi) + 124476)
+GROUP_PRIME = int(
+    'FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74020BBEA63B139B22514A0879'
+    '8E3404DDEF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B'
+    '0BFF5CB6F406B7EDEE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF0598DA4836'
+    '1C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB9ED529077096966D670C354E4ABC9804'
+    'F1746C08CA18217C32905E462E36CE3BE39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF6'
+    '955817183995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF', 16)
+# 二次剩余子群的阶（素数），即 Shamir 分片所在的域
+SUBGROUP_ORDER = (GROUP_PRIME - 1) // 2
+GENERATOR = 4
+
+# 固定基窗口位数：窗口越大求幂越快，但表越大（6 位约 2.1 万项、5.5MB）
+WINDOW_BITS = 6
+
+# 批量验证随机系数位数
+BATCH_CHALLENGE_BITS = 128
+
+# 混合模式：可验证分片的种子长度与载荷加密的随机数长度
+SEED_SIZE = 32
+NONCE_SIZE = 12
+_PAYLOAD_INFO = b'ProjectVault Feldman payload key'
+
+
+class FixedBaseTable:
+    """固定基窗口求幂表"""
+
+    __slots__ = ('base', 'modulus', 'window', 'table')
+
+    def __init__(self, base: int, modulus: int, exponent_bits: int, window: int = WINDOW_BITS):
+        """
+        :param base: 固定的底数
+        :param modulus: 模数
+        :param exponent_bits: 指数最大位数
+        :param window: 窗口位数
+        """
+        self.base = base
+        self.modulus = modulus
+        self.window = window
+
+        # table[i][d-1] = base^(d·2^(w·i))
+        self.table = []
+        current = base
+        for _ in range(-(-exponent_bits // window)):
+            row = [current]
+            for _ in range((1 << window) - 2):
+                row.append(row[-1] * current % modulus)
+            self.table.append(row)
+            current = row[-1] * current % modulus
+
+    def pow(self, exponent: int) -> int:
+        """计算 base^exponent mod modulus"""
+        if exponent < 0 or exponent.bit_length() > len(self.table) * self.window:
+            return pow(self.base, exponent, self.modulus)
+
+        mask = (1 << self.window) - 1
+        result = 1
+        for row in self.table:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                result = result * row[digit - 1] % self.modulus
+            exponent >>= self.window
+        return result
+
+
+@functools.lru_cache(maxsize=1)
+def generator_table() -> FixedBaseTable:
+    """生成元的固定基表（首次使用时构建）"""
+    return FixedBaseTable(GENERATOR, GROUP_PRIME, SUBGROUP_ORDER.bit_length())
+
+
+@functools.lru_cache(maxsize=32)
+def _commitments_valid(commitments: tuple) -> bool:
+    """承诺必须是子群元素，否则批量验证不可靠"""
+    return all(1 < c < GROUP_PRIME and pow(c, SUBGROUP_ORDER, GROUP_PRIME) == 1 for c in commitments)
+
+
+def split_verifiable(secret_bytes: bytes, n: int, k: int, key: bytes = None):
+    """
+    可验证分片
+    :param secret_bytes: 秘密字节（不超过255字节）
+    :param n: 分片数量
+    :param k: 恢复阈值
+    :param key: HMAC密钥
+    :return: (分片列表, 承诺列表)，分片格式与 Security.SSS.split_secret 相同
+    """
+    if k < 1 or n < k:
+        raise ValueError("无效的分片参数")
+    s = int.from_bytes(secret_bytes, 'big')
+    if s >= SUBGROUP_ORDER:
+        raise ValueError("秘密值超过子群阶的范围")
+
+    r = SUBGROUP_ORDER
+    coefficients = [s] + [secrets.randbelow(r) for _ in range(k - 1)]
+    table = generator_table()
+    commitments = [table.pow(a) for a in coefficients]
+
+    shares = [
+        Security.SSS.build_share(x, Security.SSS.evaluate_polynomial(coefficients, x, r),
+                                 len(secret_bytes), Security.SSS.FIELD_PRIME, key)
+        for x in range(1, n + 1)
+    ]
+    return shares, commitments
+
+
+def _commitment_product(commitments: list, exponents: list) -> int:
+    """∏ C_j^{e_j} mod q"""
+    q = GROUP_PRIME
+    result = 1
+    for c, e in zip(commitments, exponents):
+        result = result * pow(c, e, q) % q
+    return result
+
+
+def verify_share(share: dict, commitments: list) -> bool:
+    """
+    验证单个分片是否来自承诺的多项式
+    :param share: 分片字典
+    :param commitments: 承诺列表
+    """
+    if not _commitments_valid(tuple(commitments)):
+        return False
+    x = share['index']
+    y = share['share']
+    if not 0 <= y < SUBGROUP_ORDER:
+        return False
+    # x 很小，x^j 无需取模，小指数求幂开销很低
+    expected = _commitment_product(commitments, [x ** j for j in range(len(commitments))])
+    return generator_table().pow(y) == expected
+
+
+def verify_shares(shares: list, commitments: list) -> list:
+    """
+    批量验证分片（随机线性组合）
+    :param shares: 分片字典列表
+    :param commitments: 承诺列表
+    :return: 与 shares 一一对应的验证结果
+    """
+    if not shares:
+        return []
+    if not _commitments_valid(tuple(commitments)):
+        return [False] * len(shares)
+
+    if all(0 <= share['share'] < SUBGROUP_ORDER for share in shares):
+        rhos = [secrets.randbits(BATCH_CHALLENGE_BITS) | 1 for _ in shares]
+        combined = sum(rho * share['share'] for rho, share in zip(rhos, shares)) % SUBGROUP_ORDER
+        # 指数 Σρ_i x_i^j 只有一百多位，不对子群阶取模
+        exponents = [
+            sum(rho * share['index'] ** j for rho, share in zip(rhos, shares))
+            for j in range(len(commitments))
+        ]
+        if generator_table().pow(combined) == _commitment_product(commitments, exponents):
+            return [True] * len(shares)
+
+    # 批量验证失败：逐个验证找出错误分片
+    return [verify_share(share, commitments) for share in shares]
+
+
+def recover_verified(shares: list, commitments: list, k: int, key: bytes = None) -> bytes:
+    """
+    先用承诺剔除错误分片，再插值恢复
+    :param shares: 分片字典列表
+    :param commitments: 承诺列表
+    :param k: 恢复阈值
+    :param key: HMAC密钥
+    :return: 秘密字节
+    """
+    valid = [share for share, ok in zip(shares, verify_shares(shares, commitments)) if ok]
+    if len(valid) < k:
+        raise ValueError("有效分片数量不足")
+    return Security.SSS.recover_secret(valid, SUBGROUP_ORDER, k, key=key)
+
+
+def _payload_key(seed: bytes) -> bytes:
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=_PAYLOAD_INFO).derive(seed)
+
+
+def _commitments_digest(commitments: list) -> bytes:
+    """承诺的摘要（载荷密文的附加认证数据）"""
+    width = (GROUP_PRIME.bit_length() + 7) // 8
+    return hashlib.sha256(b''.join(c.to_bytes(width, 'big') for c in commitments)).digest()
+
+
+def split_payload(payload: bytes, n: int, k: int, key: bytes = None):
+    """
+    可验证分片任意长度的载荷（混合模式）
+    :param payload: 载荷字节，长度不限
+    :param n: 分片数量
+    :param k: 恢复阈值
+    :param key: HMAC密钥
+    :return: (分片列表, 承诺列表, 载荷密文)；承诺与载荷密文可公开，随每个分片一同保存
+    """
+    seed = os.urandom(SEED_SIZE)
+    shares, commitments = split_verifiable(seed, n, k, key)
+    nonce = os.urandom(NONCE_SIZE)
+    sealed = nonce + AESGCM(_payload_key(seed)).encrypt(nonce, payload, _commitments_digest(commitments))
+    return shares, commitments, sealed
+
+
+def recover_payload(shares: list, commitments: list, sealed: bytes, k: int, key: bytes = None) -> bytes:
+    """
+    验证分片后恢复 split_payload 分片的载荷
+    :param shares: 分片字典列表
+    :param commitments: 承诺列表
+    :param sealed: 载荷密文
+    :param k: 恢复阈值
+    :param key: HMAC密钥
+    :return: 载荷字节
+    """
+    seed = recover_verified(shares, commitments, k, key)
+    try:
+        return AESGCM(_payload_key(seed)).decrypt(sealed[:NONCE_SIZE], sealed[NONCE_SIZE:],
+                                                  _commitments_digest(commitments))
+    except InvalidTag as e:
+        raise ValueError("载荷解密失败：承诺或密文已被替换") from e
@@ -0,0 +1,220 @@
+# GF(2^8) 有限域运算与按字节的 Shamir 分片引擎
+# 功能点：
+# 使用对数表/指数表构建完整乘法表，所有乘除运算均为查表。
+# 秘密的每个字节各自对应一个多项式，借助 NumPy 对全部字节与全部分片索引一次性求值。
+# 分片长度与秘密长度相同，索引范围为 1~255。
+
+import functools
+import secrets
+
+import numpy as np
+
+# AES 所用的不可约多项式 x^8 + x^4 + x^3 + x + 1
+POLYNOMIAL = 0x11B
+# 乘法群生成元
+GENERATOR = 0x03
+
+MAX_SHARES = 255
+
+
+def _build_tables():
+    """构建指数表、对数表与 256x256 乘法表"""
+    exp = np.zeros(512, dtype=np.uint8)
+    log = np.zeros(256, dtype=np.int32)
+
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        # x = x * 3 = (x * 2) ^ x
+        doubled = x << 1
+        if doubled & 0x100:
+            doubled ^= POLYNOMIAL
+        x = doubled ^ x
+
+    # 指数表复制一遍，避免查表时对 255 取模
+    exp[255:510] = exp[0:255]
+
+    mul = exp[log[:, None] + log[None, :]]
+    mul[0, :] = 0
+    mul[:, 0] = 0
+    return exp, log, mul
+
+
+EXP, LOG, MUL = _build_tables()
+
+
+def gf_mul(a: int, b: int) -> int:
+    """GF(2^8) 标量乘法"""
+    return int(MUL[a, b])
+
+
+def gf_inv(a: int) -> int:
+    """GF(2^8) 标量求逆"""
+    if a == 0:
+        raise ZeroDivisionError("GF(2^8) 中 0 没有逆元")
+    return int(EXP[255 - LOG[a]])
+
+
+def gf_div(a: int, b: int) -> int:
+    """GF(2^8) 标量除法"""
+    return gf_mul(a, gf_inv(b))
+
+
+@functools.lru_cache(maxsize=128)
+def lagrange_coefficients(xs: tuple) -> tuple:
+    """
+    计算 x=0 处的拉格朗日基系数（带LRU缓存）
+    :param xs: 互不相同的分片索引（元组，作为缓存键）
+    :return: 与 xs 一一对应的系数
+    """
+    coefficients = []
+    for i, xi in enumerate(xs):
+        numerator = 1
+        denominator = 1
+        for j, xj in enumerate(xs):
+            if i == j:
+                continue
+            # 特征为 2 的域中减法即异或
+            numerator = gf_mul(numerator, xj)
+            denominator = gf_mul(denominator, xj ^ xi)
+        coefficients.append(gf_div(numerator, denominator))
+    return tuple(coefficients)
+
+
+def split_bytes(secret_bytes: bytes, n: int, k: int) -> list:
+    """
+    按字节在 GF(2^8) 上分片
+    :param secret_bytes: 秘密字节
+    :param n: 分片数量（不超过255）
+    :param k: 恢复阈值
+    :return: [(索引, 分片字节), ...]，分片字节长度与秘密相同
+    """
+    if k < 1 or n < k:
+        raise ValueError("无效的分片参数")
+    if n > MAX_SHARES:
+        raise ValueError(f"GF(2^8) 分片数量不能超过{MAX_SHARES}")
+
+    secret = np.frombuffer(secret_bytes, dtype=np.uint8)
+    length = secret.size
+
+    # 每行一个高次系数，每列对应秘密的一个字节
+    coefficients = np.frombuffer(
+        secrets.token_bytes((k - 1) * length), dtype=np.uint8
+    ).reshape(k - 1, length)
+
+    # 所有索引一起做 Horner 求值：values[i] = f(xs[i])
+    xs = np.arange(1, n + 1, dtype=np.uint8)[:, None]
+    values = np.zeros((n, length), dtype=np.uint8)
+    for coeff in coefficients[::-1]:
+        values = MUL[xs, values] ^ coeff
+    values = MUL[xs, values] ^ secret
+
+    return [(x, values[x - 1].tobytes()) for x in range(1, n + 1)]
+
+
+def recover_bytes(points: list) -> bytes:
+    """
+    由 k 个分片在 GF(2^8) 上插值恢复秘密
+    :param points: [(索引, 分片字节), ...]
+    :return: 秘密字节
+    """
+    xs = tuple(x for x, _ in points)
+    if len(set(xs)) != len(xs):
+        raise ValueError("分片索引重复")
+    if any(not 0 < x <= MAX_SHARES for x in xs):
+        raise ValueError("分片索引超出 GF(2^8) 范围")
+
+    lengths = {len(y) for _, y in points}
+    if len(lengths) != 1:
+        raise ValueError("分片长度不一致")
+
+    ys = np.frombuffer(b''.join(y for _, y in points), dtype=np.uint8).reshape(len(points), lengths.pop())
+    coefficients = np.array(lagrange_coefficients(xs), dtype=np.uint8)[:, None]
+
+    # 各分片乘以基系数后逐字节异或求和
+    return np.bitwise_xor.reduce(MUL[coefficients, ys], axis=0).tobytes()
+
+
+def disperse_bytes(data: bytes, n: int, k: int) -> list:
+    """
+    Rabin 信息分散：数据切为 k 行作为多项式系数，在 n 个索引处求值（范德蒙德编码）
+    :param data: 待分散的数据
+    :param n: 分片数量（不超过255）
+    :param k: 恢复所需分片数
+    :return: [(索引, 分片字节), ...]，每个分片长度为 ceil(len(data) / k)
+    """
+    if k < 1 or n < k:
+        raise ValueError("无效的分片参数")
+    if n > MAX_SHARES:
+        raise ValueError(f"GF(2^8) 分片数量不能超过{MAX_SHARES}")
+
+    width = -(-len(data) // k)
+    rows = np.zeros(k * width, dtype=np.uint8)
+    rows[:len(data)] = np.frombuffer(data, dtype=np.uint8)
+    rows = rows.reshape(k, width)
+
+    xs = np.arange(1, n + 1, dtype=np.uint8)[:, None]
+    values = np.zeros((n, width), dtype=np.uint8)
+    for row in rows[::-1]:
+        values = MUL[xs, values] ^ row
+
+    return [(x, values[x - 1].tobytes()) for x in range(1, n + 1)]
+
+
+@functools.lru_cache(maxsize=128)
+def vandermonde_inverse(xs: tuple) -> np.ndarray:
+    """
+    高斯-约当消元求范德蒙德矩阵 V[i][j] = xs[i]^j 的逆矩阵（带LRU缓存）
+    :param xs: 互不相同的非零索引
+    """
+    k = len(xs)
+    matrix = np.zeros((k, 2 * k), dtype=np.uint8)
+    for i, x in enumerate(xs):
+        value = 1
+        for j in range(k):
+            matrix[i, j] = value
+            value = gf_mul(value, x)
+        matrix[i, k + i] = 1
+
+    for c in range(k):
+        pivot = c + int(np.flatnonzero(matrix[c:, c])[0])
+        matrix[[c, pivot]] = matrix[[pivot, c]]
+        matrix[c] = MUL[gf_inv(int(matrix[c, c])), matrix[c]]
+        factors = matrix[:, c].copy()
+        factors[c] = 0
+        matrix ^= MUL[factors[:, None], matrix[c][None, :]]
+
+    inverse = matrix[:, k:].copy()
+    inverse.setflags(write=False)
+    return inverse
+
+
+def gather_bytes(points: list, length: int) -> bytes:
+    """
+    由 k 个分散分片还原数据
+    :param points: [(索引, 分片字节), ...]，数量等于分散时的 k
+    :param length: 原始数据长度
+    :return: 原始数据
+    """
+    xs = tuple(x for x, _ in points)
+    if len(set(xs)) != len(xs):
+        raise ValueError("分片索引重复")
+    if any(not 0 < x <= MAX_SHARES for x in xs):
+        raise ValueError("分片索引超出 GF(2^8) 范围")
+
+    lengths = {len(y) for _, y in points}
+    if len(lengths) != 1:
+        raise ValueError("分片长度不一致")
+    width = lengths.pop()
+    if length > width * len(points):
+        raise ValueError("原始数据长度超出分片容量")
+
+    fragments = np.frombuffer(b''.join(y for _, y in points), dtype=np.uint8).reshape(len(points), width)
+    inverse = vandermonde_inverse(xs)
+
+    # rows = V^-1 · fragments，逐列累加以控制内存
+    rows = np.zeros((len(points), width), dtype=np.uint8)
+    for i in range(len(points)):
+        rows ^= MUL[inverse[:, i][:, None], fragments[i][None, :]]
+    return rows.tobytes()[:length]
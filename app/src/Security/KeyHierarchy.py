@@ -0,0 +1,78 @@
+# 会话密钥层级
+# 功能点：
+# 解锁时口令只做一次慢速拉伸（见 Security.Password.unlock），得到用户的根密钥；
+# 数据库配置、列加密、导出、分片 HMAC 等各子系统的密钥都由根密钥经 HKDF-SHA256 按标签派生，
+# 派生只需微秒级，解锁开销与需要密钥的子系统数量无关。
+# 根密钥只保存在内存中，锁定或退出时调用 lock 清除。
+
+import base64
+import threading
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+ROOT_KEY_SIZE = 32
+
+# 子密钥标签
+LABEL_DB_CONFIG = 'db-config'
+LABEL_COLUMN = 'column'
+LABEL_EXPORT = 'export'
+LABEL_SHARE_HMAC = 'share-hmac'
+
+_INFO_PREFIX = b'ProjectVault key hierarchy v1 '
+
+_root = None
+_lock = threading.Lock()
+
+
+def derive(key: bytes, label: str, length: int = 32) -> bytes:
+    """
+    由密钥按标签派生子密钥（HKDF-SHA256）
+    :param key: 输入密钥
+    :param label: 标签，不同标签的子密钥相互独立
+    :param length: 子密钥长度
+    """
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=length,
+        salt=None,
+        info=_INFO_PREFIX + label.encode('utf-8'),
+    ).derive(key)
+
+
+def unlock(root_key: bytes):
+    """设置当前根密钥（登录成功后调用）"""
+    global _root
+    if len(root_key) != ROOT_KEY_SIZE:
+        raise ValueError(f"根密钥长度必须为{ROOT_KEY_SIZE}字节")
+    with _lock:
+        _root = bytes(root_key)
+
+
+def lock():
+    """清除根密钥"""
+    global _root
+    with _lock:
+        _root = None
+
+
+def is_unlocked() -> bool:
+    """是否已解锁"""
+    return _root is not None
+
+
+def subkey(label: str, length: int = 32) -> bytes:
+    """
+    派生当前根密钥的子密钥
+    :param label: LABEL_DB_CONFIG、LABEL_COLUMN、LABEL_EXPORT、LABEL_SHARE_HMAC 等
+    :param length: 子密钥长度
+    """
+    root = _root
+    if root is None:
+        raise ValueError("尚未解锁，无法派生子密钥")
+    return derive(root, label, length)
+
+
+def fernet_key(label: str) -> bytes:
+    """子密钥的 Fernet 编码形式（供 Database.Gatekeeper 等使用 Fernet 的模块）"""
+    return base64.urlsafe_b64encode(subkey(label))
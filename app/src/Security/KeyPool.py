@@ -0,0 +1,201 @@
+# RSA 密钥对预生成池
+# 功能点：
+# 后台线程预先生成少量密钥对，以 Fernet 加密后保存在 key/pool/ 下（数量有上限）。
+# acquire_keypair() 立即返回 Future：池中有现成密钥对时 Future 已完成，否则在后台生成。
+# 取出密钥对后自动在后台补充，界面线程不会阻塞在 RSA 素数搜索上。
+#
+# 池文件名为 rsa{位数}-{随机编号}.enc，内容为 Fernet 加密的 PKCS8 DER 私钥；
+# 池密钥保存在 key/pool.key，与 Database.Gatekeeper 的配置密钥相互独立。
+
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import serialization
+
+import Security.Crypto
+
+CWD = os.getcwd()
+
+POOL_DIR = f'{CWD}/key/pool'
+POOL_KEY_PATH = f'{CWD}/key/pool.key'
+
+# 池中最多保留的密钥对数量
+POOL_SIZE = 2
+
+
+class KeyPool:
+    """有上限、静态加密的密钥对池"""
+
+    def __init__(self, size: int = POOL_SIZE, key_size: int = Security.Crypto.RSA_KEY_SIZE,
+                 directory: str = POOL_DIR, key_path: str = POOL_KEY_PATH):
+        """
+        :param size: 池中最多保留的密钥对数量
+        :param key_size: RSA 密钥位数
+        :param directory: 池文件目录
+        :param key_path: 池加密密钥路径
+        """
+        self.size = size
+        self.key_size = key_size
+        self.directory = directory
+        self.key_path = key_path
+
+        self._lock = threading.Lock()
+        self._refilling = False
+        with self._lock:
+            self._fernet = self._load_key()
+        # 一个线程补充池，另一个线程处理池为空时的即时生成
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='KeyPool')
+
+    def _load_key(self) -> Fernet:
+        """加载池加密密钥，不存在时生成（以独占方式创建，其他进程已写入时改为读取）"""
+        os.makedirs(os.path.dirname(self.key_path), exist_ok=True)
+        try:
+            with open(self.key_path, 'xb') as f:
+                f.write(Fernet.generate_key())
+        except FileExistsError:
+            pass
+        with open(self.key_path, 'rb') as f:
+            return Fernet(f.read())
+
+    def _entries(self) -> list:
+        """当前位数的池文件（按修改时间先后）"""
+        if not os.path.isdir(self.directory):
+            return []
+        prefix = f'rsa{self.key_size}-'
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.startswith(prefix) and name.endswith('.enc')]
+        return sorted(paths, key=os.path.getmtime)
+
+    def count(self) -> int:
+        """池中现有密钥对数量"""
+        with self._lock:
+            return len(self._entries())
+
+    def _store(self, private_key):
+        """加密保存一个密钥对（先写临时文件再改名，避免留下半个文件）"""
+        der = private_key.private_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        token = self._fernet.encrypt(der)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'rsa{self.key_size}-{uuid.uuid4().hex}.enc')
+        with open(path + '.tmp', 'wb') as f:
+            f.write(token)
+        os.replace(path + '.tmp', path)
+
+    def _take(self):
+        """从池中取出一个密钥对，池为空时返回None；无法解密的池文件直接丢弃"""
+        with self._lock:
+            for path in self._entries():
+                try:
+                    with open(path, 'rb') as f:
+                        token = f.read()
+                    os.remove(path)
+                    der = self._fernet.decrypt(token)
+                    return serialization.load_der_private_key(der, password=None)
+                except (OSError, InvalidToken, ValueError):
+                    continue
+        return None
+
+    def _refill(self):
+        try:
+            while True:
+                with self._lock:
+                    if len(self._entries()) >= self.size:
+                        return
+                self._store(Security.Crypto.Asymmetric.generate_private_key(self.key_size))
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def start_refill(self):
+        """在后台把池补满（已有补充任务时不重复提交）"""
+        with self._lock:
+            if self._refilling:
+                return
+            self._refilling = True
+        self._executor.submit(self._refill)
+
+    def acquire_keypair(self, refill: bool = True) -> Future:
+        """
+        获取一个密钥对（不阻塞）
+        :param refill: 取出后是否在后台补充池
+        :return: Future，结果为 RSA 私钥对象（公钥由 private_key.public_key() 得到）
+        """
+        private_key = self._take()
+        if private_key is not None:
+            future = Future()
+            future.set_result(private_key)
+        else:
+            future = self._executor.submit(Security.Crypto.Asymmetric.generate_private_key, self.key_size)
+        if refill:
+            self.start_refill()
+        return future
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> KeyPool:
+    """进程内共用的密钥对池"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = KeyPool()
+        return _pool
+
+
+def acquire_keypair(refill: bool = True) -> Future:
+    """从共用池获取一个密钥对，见 KeyPool.acquire_keypair"""
+    return get_pool().acquire_keypair(refill)
+
+
+def start_refill():
+    """
+    启动时在后台补充共用池
+    本机已有密钥对时 provision_user_keypair 不再取用池中的密钥对，此时不补充，避免生成无人使用的密钥
+    """
+    if not _keypair_exists():
+        get_pool().start_refill()
+
+
+def provision_user_keypair(user: str) -> Future:
+    """
+    在后台为用户获取并保存密钥对
+    密钥对（key/key、key/key.pub）为本机所有用户共用，数据密钥由它封装，已存在时不再覆盖
+    :param user: 用户名（写入密钥生成日志）
+    :return: Future，结果为True（已有密钥对时立即完成）；保存失败时为 RuntimeError
+    """
+    result = Future()
+    if _keypair_exists():
+        result.set_result(True)
+        return result
+
+    def install(keypair: Future):
+        try:
+            private_key = keypair.result()
+            with _provision_lock:
+                # 等待期间其他注册可能已保存密钥对
+                if not _keypair_exists() and not Security.Crypto.Asymmetric.rsa_keygen(user, private_key):
+                    raise RuntimeError("密钥对保存失败")
+            result.set_result(True)
+        except Exception as e:
+            result.set_exception(e)
+
+    # 保存后本机已有密钥对，池中的密钥对不会再被取用，不再补充
+    acquire_keypair(refill=False).add_done_callback(install)
+    return result
+
+
+_provision_lock = threading.Lock()
+
+
+def _keypair_exists() -> bool:
+    return os.path.exists(Security.Crypto.PRIVATE_KEY_PATH) and os.path.exists(Security.Crypto.PUBLIC_KEY_PATH)
@@ -0,0 +1,97 @@
+# 大规模分片引擎（50~255 个持有人的委员会）
+# 功能点：
+# n、k 由调用方自由指定，可选子积树多点求值或逐点 Horner（延迟取模）求出全部分片值。
+# n 较大时把求值点分组，交给 ProcessPoolExecutor 并行计算。
+# 分片索引是很小的整数，Horner 每步只是“大整数 × 小整数”，实测比子积树中的大整数乘法更快，
+# 因此默认使用 Horner；求值点较大或 k 接近 n 的场景可选用子积树。
+# 返回分片的同时返回各阶段耗时，分片格式与 Security.SSS.split_secret 相同。
+
+import math
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import Security.Poly
+import Security.Primes
+import Security.SSS
+
+# 分片数达到该值且可用多个进程时才启用进程池（进程启动本身有开销）
+PARALLEL_THRESHOLD = 64
+
+# 求值方式
+METHOD_HORNER = 'horner'  # 逐点 Horner，延迟取模
+METHOD_TREE = 'tree'  # 子积树多点求值
+
+_EVALUATORS = {
+    METHOD_HORNER: Security.Poly.evaluate_many,
+    METHOD_TREE: Security.Poly.multipoint_evaluate,
+}
+
+
+def _evaluate_chunk(method: str, coefficients: list, xs: list, p: int) -> list:
+    """进程池任务：对一组求值点求值"""
+    return _EVALUATORS[method](coefficients, xs, p)
+
+
+def split_secret_large(secret_bytes: bytes, n: int, k: int, p: int = None,
+                       workers: int = None, method: str = METHOD_HORNER, key: bytes = None):
+    """
+    大规模分片生成
+    :param secret_bytes: 秘密字节
+    :param n: 分片数量
+    :param k: 恢复阈值
+    :param p: 素数，为None时从素数注册表中选取能容纳秘密的最小素数
+    :param workers: 进程数，为None时使用CPU核数；为1时不启用进程池
+    :param method: 求值方式，METHOD_HORNER 或 METHOD_TREE
+    :param key: HMAC密钥，给出时分片标签为 HMAC-SHA256
+    :return: (分片列表, 耗时统计字典)
+    """
+    start = time.perf_counter()
+    timing = {}
+
+    if k < 1 or n < k:
+        raise ValueError("无效的分片参数")
+    if method not in _EVALUATORS:
+        raise ValueError(f"不支持的求值方式：{method}")
+    if p is None:
+        p = Security.Primes.prime_for_secret(secret_bytes)
+
+    s = int.from_bytes(secret_bytes, byteorder='big')
+    if s >= p:
+        raise ValueError("秘密值超过素数p的范围")
+
+    # 生成多项式系数
+    coefficients = [s] + [secrets.randbelow(p) for _ in range(k - 1)]
+    indices = list(range(1, n + 1))
+    timing['coefficients'] = time.perf_counter() - start
+
+    # 多点求值
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n))
+
+    checkpoint = time.perf_counter()
+    if n >= PARALLEL_THRESHOLD and workers > 1:
+        chunk_size = math.ceil(n / workers)
+        chunks = [indices[i:i + chunk_size] for i in range(0, n, chunk_size)]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [pool.submit(_evaluate_chunk, method, coefficients, chunk, p) for chunk in chunks]
+            values = [y for future in futures for y in future.result()]
+    else:
+        workers = 1
+        values = _evaluate_chunk(method, coefficients, indices, p)
+    timing['evaluate'] = time.perf_counter() - checkpoint
+
+    # 组装分片并计算哈希
+    checkpoint = time.perf_counter()
+    shares = [
+        Security.SSS.build_share(x, y, len(secret_bytes), Security.SSS.FIELD_PRIME, key)
+        for x, y in zip(indices, values)
+    ]
+    timing['hash'] = time.perf_counter() - checkpoint
+
+    timing['total'] = time.perf_counter() - start
+    timing['workers'] = workers
+    timing['method'] = method
+    return shares, timing
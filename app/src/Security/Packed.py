@@ -0,0 +1,158 @@
+# 打包（门限渐变）秘密分片
+# 功能点：
+# 一个多项式同时携带 l 个秘密，秘密j放在求值点 -j（模p）处，另取 t 个随机值放在 -l, ..., -(k-1) 处，
+# 多项式次数为 k-1，其中 k = t + l。
+#   隐私门限 t：任意 t 个分片不泄露任何秘密信息；
+#   恢复门限 k：任意 k 个分片可恢复全部秘密。
+# 每个持有人对一批秘密只持有 ceil(秘密数 / l) 个分片值，分片存储与运算量约降为原来的 1/l。
+# 分片包格式与 Security.SSS.split_many 相同，另记录隐私门限与恢复门限（计入标签）。
+
+import functools
+import secrets
+import struct
+
+import Security.Primes
+import Security.SSS
+
+# 门限参数，随分片字节一起计算标签，防止被改动
+_THRESHOLDS = struct.Struct('>HH')
+
+
+@functools.lru_cache(maxsize=Security.SSS.LAGRANGE_CACHE_SIZE)
+def lagrange_basis(xs: tuple, target: int, p: int) -> tuple:
+    """
+    计算任意求值点处的拉格朗日基系数（带LRU缓存）
+    :param xs: 互不相同的插值点（元组，作为缓存键）
+    :param target: 求值点
+    :param p: 素数
+    :return: 与 xs 一一对应的系数，f(target) = Σ coefficients[i] * f(xs[i])
+    """
+    numerators = []
+    denominators = []
+    for i, xi in enumerate(xs):
+        numerator = 1
+        denominator = 1
+        for j, xj in enumerate(xs):
+            if i == j:
+                continue
+            numerator = numerator * (target - xj) % p
+            denominator = denominator * (xi - xj) % p
+        numerators.append(numerator)
+        denominators.append(denominator)
+
+    inverses = Security.SSS.batch_inverse(denominators, p)
+    return tuple(num * inv % p for num, inv in zip(numerators, inverses))
+
+
+def _anchor_points(k: int, p: int) -> tuple:
+    """多项式的锚点 0, -1, ..., -(k-1)（模p），前 l 个放秘密，其余放随机值"""
+    return tuple(-j % p for j in range(k))
+
+
+def _bundle_bytes(ys: list, t: int, k: int, width: int) -> bytes:
+    return _THRESHOLDS.pack(t, k) + b''.join(y.to_bytes(width, 'big') for y in ys)
+
+
+def split_packed(secret_list: list, n: int, t: int, k: int, p: int = None, key: bytes = None) -> list:
+    """
+    打包分片
+    :param secret_list: 秘密字节列表
+    :param n: 分片数量
+    :param t: 隐私门限，任意t个分片不泄露秘密
+    :param k: 恢复门限，任意k个分片可恢复全部秘密；每个多项式携带 k-t 个秘密
+    :param p: 素数，为None时按最长秘密从素数注册表中选取
+    :param key: HMAC密钥
+    :return: n 个分片包，每个持有人一个
+    """
+    if t < 1 or k <= t or n < k:
+        raise ValueError("无效的分片参数")
+    lengths = [len(secret) for secret in secret_list]
+    if p is None:
+        p = Security.Primes.prime_for_length(max(lengths, default=0))
+    if n >= p - k:
+        raise ValueError("分片数量超出素数域范围")
+
+    values = [int.from_bytes(secret, 'big') for secret in secret_list]
+    if any(s >= p for s in values):
+        raise ValueError("秘密值超过素数p的范围")
+
+    # 每 l 个秘密一组，最后一组不足时用随机值补齐
+    packing = k - t
+    groups = []
+    for i in range(0, len(values), packing):
+        group = values[i:i + packing]
+        group += [secrets.randbelow(p) for _ in range(k - len(group))]
+        groups.append(group)
+
+    # 各分片索引处的基系数只算一次，所有组共用
+    anchors = _anchor_points(k, p)
+    width = (p.bit_length() + 7) // 8
+    bundles = []
+    for x in range(1, n + 1):
+        basis = lagrange_basis(anchors, x, p)
+        ys = [sum(v * l for v, l in zip(group, basis)) % p for group in groups]
+        bundles.append({
+            'index': x,
+            'share': ys,
+            'hash': Security.SSS.share_hash(x, _bundle_bytes(ys, t, k, width), key),
+            'hash_alg': Security.SSS.TAG_SHA256 if key is None else Security.SSS.TAG_HMAC,
+            'lengths': lengths,
+            'privacy': t,
+            'threshold': k,
+            'field': Security.SSS.FIELD_PRIME
+        })
+    return bundles
+
+
+def recover_packed(bundles: list, p: int = None, key: bytes = None) -> list:
+    """
+    打包恢复
+    :param bundles: split_packed 生成的分片包（至少k个）
+    :param p: 素数，为None时按最长秘密从素数注册表中选取（与分片时的默认选择一致）
+    :param key: HMAC密钥，分片包使用 HMAC 标签时必须提供
+    :return: 与分片时顺序一致的秘密字节列表
+    """
+    # 以第一个通过校验的分片包确定批次参数（门限参数计入标签，被改动的分片包无法通过校验）
+    params = None
+    valid_bundles = []
+    for bundle in bundles:
+        lengths, t, k = bundle['lengths'], bundle['privacy'], bundle['threshold']
+        if params is not None and (lengths, t, k) != params[:3]:
+            continue  # 跳过来自其他批次的分片包
+
+        prime = p if p is not None else Security.Primes.prime_for_length(max(lengths, default=0))
+        data = _bundle_bytes(bundle['share'], t, k, (prime.bit_length() + 7) // 8)
+        if not Security.SSS.verify_shares([{'index': bundle['index'], 'share': data,
+                                            'hash': bundle['hash'], 'hash_alg': bundle['hash_alg']}], key)[0]:
+            continue  # 跳过无效分片包
+
+        if params is None:
+            params = (lengths, t, k, prime)
+        valid_bundles.append(bundle)
+
+    if params is None:
+        raise ValueError("有效分片数量不足")
+    lengths, t, k, p = params
+
+    if len(valid_bundles) < k:
+        raise ValueError("有效分片数量不足")
+    valid_bundles = sorted(valid_bundles[:k], key=lambda b: b['index'])
+
+    xs = tuple(b['index'] for b in valid_bundles)
+    if len(set(xs)) != len(xs):
+        raise ValueError("分片索引重复")
+
+    # 每个秘密位置的基系数只算一次，所有组共用
+    packing = k - t
+    anchors = _anchor_points(k, p)
+    bases = [lagrange_basis(xs, anchors[j], p) for j in range(packing)]
+
+    secret_list = []
+    for i, length in enumerate(lengths):
+        group, j = divmod(i, packing)
+        secret = sum(b['share'][group] * l for b, l in zip(valid_bundles, bases[j])) % p
+        try:
+            secret_list.append(secret.to_bytes(length, 'big'))
+        except OverflowError:
+            raise ValueError("恢复结果超出原始长度，分片与素数可能不匹配")
+    return secret_list
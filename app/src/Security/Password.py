@@ -0,0 +1,322 @@
+# 口令哈希
+# 功能点：
+# 初始化时在本机测量 KDF 速度，选出使单次哈希耗时接近目标时延的参数（PBKDF2 迭代次数或 scrypt 代价），
+# 参数保存在 config/password_kdf.json，之后所有哈希都使用该参数，无需改代码即可在不同主机上获得可预期的登录时延。
+# 校准只在初始化（Gui.SetupInterface）时进行；尚未校准时使用下限参数 DEFAULT_PARAMETERS，登录与注册路径从不校准。
+# 配置文件无法写入时参数只保存在内存中，不影响登录。
+# 哈希字符串自带算法与参数，旧参数生成的哈希仍可验证；
+# 登录成功时若哈希使用的是旧格式或弱于当前参数，verify_password 同时返回按当前参数重新计算的哈希，由调用方写回数据库。
+#
+# 口令拉伸结果经 HKDF 分为登录校验值与封装密钥，后者以 AES-GCM 封装用户的随机根密钥（见 Security.KeyHierarchy），
+# 登录时一次拉伸同时完成验证与解锁；升级哈希时封装的是同一个根密钥，由根密钥派生的子密钥保持不变。
+#
+# 哈希格式（盐、校验值与封装的根密钥为不带填充的 Base64）：
+#   $pbkdf2-sha256$i=<迭代次数>$<盐>$<校验值>$<封装的根密钥>
+#   $scrypt$ln=<log2(N)>,r=<r>,p=<p>$<盐>$<校验值>$<封装的根密钥>
+# 兼容的旧格式（验证成功后升级）：
+#   $<算法>$<参数>$<盐>$<拉伸结果>  不含根密钥
+#   <盐hex>:<摘要hex>  PBKDF2-SHA256，100000 次迭代
+#   <摘要hex>          无盐 SHA-256
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+import Security.KeyHierarchy
+
+CWD = os.getcwd()
+
+PARAMETERS_PATH = f'{CWD}/config/password_kdf.json'
+
+ALGORITHM_PBKDF2 = 'pbkdf2-sha256'
+ALGORITHM_SCRYPT = 'scrypt'
+DEFAULT_ALGORITHM = ALGORITHM_PBKDF2
+
+# 单次哈希的目标耗时（秒）
+TARGET_LATENCY = 0.25
+
+SALT_SIZE = 16
+DIGEST_SIZE = 32
+
+# 校准结果的下限与上限：下限不低于旧版固定参数，上限防止测量异常时登录卡死
+PBKDF2_MIN_ITERATIONS = 100000
+PBKDF2_MAX_ITERATIONS = 10000000
+SCRYPT_MIN_LOG_N = 14
+# scrypt 内存约为 128·r·N 字节，上限 2^17 时约 128 MiB
+SCRYPT_MAX_LOG_N = 17
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+LEGACY_PBKDF2_ITERATIONS = 100000
+
+# 拉伸结果的用途标签：登录校验值与根密钥封装密钥相互独立，数据库中的校验值推不出封装密钥
+LABEL_VERIFIER = 'login-verifier'
+LABEL_ROOT_KEK = 'root-kek'
+_ROOT_AAD = b'ProjectVault root key'
+
+# 尚未校准时使用的参数（与旧版固定参数相同）
+DEFAULT_PARAMETERS = {'algorithm': ALGORITHM_PBKDF2, 'params': {'i': PBKDF2_MIN_ITERATIONS}}
+
+_parameters = None
+_parameters_lock = threading.Lock()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password: bytes, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+    n = 1 << log_n
+    # 默认 maxmem 为 32MB，N 较大时需要放宽（scrypt 内存约为 128·r·N 字节）
+    return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, dklen=DIGEST_SIZE,
+                          maxmem=256 * r * n + (1 << 20))
+
+
+def _derive(password: bytes, salt: bytes, algorithm: str, params: dict) -> bytes:
+    if algorithm == ALGORITHM_PBKDF2:
+        return hashlib.pbkdf2_hmac('sha256', password, salt, params['i'], DIGEST_SIZE)
+    if algorithm == ALGORITHM_SCRYPT:
+        return _scrypt(password, salt, params['ln'], params['r'], params['p'])
+    raise ValueError(f"不支持的口令哈希算法：{algorithm}")
+
+
+def calibrate(algorithm: str = DEFAULT_ALGORITHM, target: float = TARGET_LATENCY) -> dict:
+    """
+    测量本机速度，选出单次哈希耗时接近 target 的参数
+    :param algorithm: ALGORITHM_PBKDF2 或 ALGORITHM_SCRYPT
+    :param target: 目标耗时（秒）
+    :return: {'algorithm': 算法, 'params': 参数}
+    """
+    password, salt = b'calibration', os.urandom(SALT_SIZE)
+    if algorithm == ALGORITHM_PBKDF2:
+        # 迭代次数与耗时成正比：测一次小规模，再按比例放大
+        probe = 20000
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac('sha256', password, salt, probe, DIGEST_SIZE)
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        iterations = round(probe * target / elapsed, -3)
+        iterations = int(min(max(iterations, PBKDF2_MIN_ITERATIONS), PBKDF2_MAX_ITERATIONS))
+        return {'algorithm': algorithm, 'params': {'i': iterations}}
+
+    if algorithm == ALGORITHM_SCRYPT:
+        # 耗时与 N 成正比，N 只能取 2 的幂：测下限一次，取耗时不超过目标的最大 N
+        log_n = SCRYPT_MIN_LOG_N
+        start = time.perf_counter()
+        _scrypt(password, salt, log_n, SCRYPT_R, SCRYPT_P)
+        elapsed = time.perf_counter() - start
+        while log_n < SCRYPT_MAX_LOG_N and elapsed * 2 <= target:
+            log_n += 1
+            elapsed *= 2
+        # N 较大时内存带宽成为瓶颈，实际耗时可能高于线性估计：复测一次，明显超出时退一档
+        if log_n > SCRYPT_MIN_LOG_N:
+            start = time.perf_counter()
+            _scrypt(password, salt, log_n, SCRYPT_R, SCRYPT_P)
+            if time.perf_counter() - start > target * 1.5:
+                log_n -= 1
+        return {'algorithm': algorithm, 'params': {'ln': log_n, 'r': SCRYPT_R, 'p': SCRYPT_P}}
+
+    raise ValueError(f"不支持的口令哈希算法：{algorithm}")
+
+
+def _valid_parameters(parameters: dict) -> bool:
+    required = {ALGORITHM_PBKDF2: ('i',), ALGORITHM_SCRYPT: ('ln', 'r', 'p')}.get(parameters.get('algorithm'))
+    params = parameters.get('params')
+    return (required is not None and isinstance(params, dict)
+            and all(isinstance(params.get(key), int) and params[key] > 0 for key in required))
+
+
+def save_parameters(parameters: dict, path: str = PARAMETERS_PATH) -> bool:
+    """
+    设为当前参数并保存校准结果
+    :return: 是否写入了配置文件；无法写入时参数仍在本进程内生效
+    """
+    global _parameters
+    with _parameters_lock:
+        _parameters = {'algorithm': parameters['algorithm'], 'params': dict(parameters['params'])}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({**parameters, 'target': TARGET_LATENCY, 'calibrated_at': time.strftime('%Y-%m-%dT%H:%M:%S')},
+                      f, indent=2)
+    except OSError:
+        return False
+    return True
+
+
+def calibrate_and_save(algorithm: str = DEFAULT_ALGORITHM, target: float = TARGET_LATENCY):
+    """
+    初始化时调用：校准并保存参数
+    :return: (参数, 是否写入了配置文件)
+    """
+    parameters = calibrate(algorithm, target)
+    return parameters, save_parameters(parameters)
+
+
+def current_parameters() -> dict:
+    """
+    当前参数：已保存的校准结果，尚未校准或无法解析时为 DEFAULT_PARAMETERS（不在此处校准）
+    :return: {'algorithm': 算法, 'params': 参数}
+    """
+    global _parameters
+    with _parameters_lock:
+        if _parameters is not None:
+            return _parameters
+        try:
+            with open(PARAMETERS_PATH, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        if isinstance(saved, dict) and _valid_parameters(saved):
+            _parameters = {'algorithm': saved['algorithm'], 'params': saved['params']}
+        else:
+            _parameters = DEFAULT_PARAMETERS
+        return _parameters
+
+
+def _encode(algorithm: str, params: dict, salt: bytes, verifier: bytes, wrapped_root: bytes) -> str:
+    if algorithm == ALGORITHM_PBKDF2:
+        encoded_params = f"i={params['i']}"
+    else:
+        encoded_params = f"ln={params['ln']},r={params['r']},p={params['p']}"
+    return (f'${algorithm}${encoded_params}${_b64encode(salt)}'
+            f'${_b64encode(verifier)}${_b64encode(wrapped_root)}')
+
+
+def _decode(encoded: str):
+    """
+    解析哈希字符串，无法识别时返回None
+    :return: (算法, 参数, 盐, 摘要, 封装的根密钥)；不含根密钥的旧格式中摘要为拉伸结果本身，根密钥为None
+    """
+    if encoded.startswith('$'):
+        parts = encoded.split('$')
+        if len(parts) not in (5, 6) or parts[1] not in (ALGORITHM_PBKDF2, ALGORITHM_SCRYPT):
+            return None
+        try:
+            params = {key: int(value) for key, value in (item.split('=') for item in parts[2].split(','))}
+            salt, digest = _b64decode(parts[3]), _b64decode(parts[4])
+            wrapped_root = _b64decode(parts[5]) if len(parts) == 6 else None
+        except ValueError:
+            return None
+        # 参数超出校准可能给出的上限的哈希不计算，避免损坏或被篡改的记录拖垮登录或耗尽内存
+        limits = ({'i': PBKDF2_MAX_ITERATIONS} if parts[1] == ALGORITHM_PBKDF2
+                  else {'ln': SCRYPT_MAX_LOG_N, 'r': SCRYPT_R, 'p': SCRYPT_P})
+        if any(not 0 < params.get(key, 0) <= limit for key, limit in limits.items()):
+            return None
+        return parts[1], params, salt, digest, wrapped_root
+
+    # 旧版注册界面生成的 PBKDF2 哈希
+    if ':' in encoded:
+        try:
+            salt_hex, digest_hex = encoded.split(':')
+            return (ALGORITHM_PBKDF2, {'i': LEGACY_PBKDF2_ITERATIONS},
+                    bytes.fromhex(salt_hex), bytes.fromhex(digest_hex), None)
+        except ValueError:
+            return None
+    return None
+
+
+def _wrap_root(stretched: bytes, root_key: bytes) -> bytes:
+    nonce = os.urandom(12)
+    kek = Security.KeyHierarchy.derive(stretched, LABEL_ROOT_KEK)
+    return nonce + AESGCM(kek).encrypt(nonce, root_key, _ROOT_AAD)
+
+
+def _unwrap_root(stretched: bytes, wrapped_root: bytes):
+    kek = Security.KeyHierarchy.derive(stretched, LABEL_ROOT_KEK)
+    try:
+        return AESGCM(kek).decrypt(wrapped_root[:12], wrapped_root[12:], _ROOT_AAD)
+    except (InvalidTag, ValueError):
+        return None
+
+
+def hash_password(password: str, parameters: dict = None, root_key: bytes = None) -> str:
+    """
+    计算口令哈希
+    :param password: 口令
+    :param parameters: {'algorithm': 算法, 'params': 参数}，为None时使用 current_parameters()
+    :param root_key: 要封装进哈希的根密钥，为None时生成新的根密钥
+    :return: 哈希字符串
+    """
+    parameters = parameters or current_parameters()
+    if root_key is None:
+        root_key = os.urandom(Security.KeyHierarchy.ROOT_KEY_SIZE)
+    salt = os.urandom(SALT_SIZE)
+    stretched = _derive(password.encode('utf-8'), salt, parameters['algorithm'], parameters['params'])
+    verifier = Security.KeyHierarchy.derive(stretched, LABEL_VERIFIER)
+    return _encode(parameters['algorithm'], parameters['params'], salt, verifier, _wrap_root(stretched, root_key))
+
+
+def has_root_key(encoded: str) -> bool:
+    """哈希中是否封装了根密钥"""
+    decoded = _decode(encoded)
+    return decoded is not None and decoded[4] is not None
+
+
+def needs_rehash(encoded: str) -> bool:
+    """哈希是否为旧格式、不含根密钥或弱于当前参数（比当前参数更强的不降级）"""
+    decoded = _decode(encoded)
+    if decoded is None or decoded[4] is None:
+        return True
+    algorithm, params = decoded[0], decoded[1]
+    current = current_parameters()
+    if algorithm != current['algorithm']:
+        return True
+    if algorithm == ALGORITHM_PBKDF2:
+        return params['i'] < current['params']['i']
+    return (params['ln'], params['r'], params['p']) < tuple(current['params'][k] for k in ('ln', 'r', 'p'))
+
+
+def unlock(password: str, encoded: str):
+    """
+    验证口令并取出根密钥（口令只拉伸一次）
+    :param password: 口令
+    :param encoded: 数据库中保存的哈希
+    :return: (是否正确, 新哈希, 根密钥)；口令错误时后两项为None。
+             哈希需要升级时新哈希封装同一个根密钥（旧格式没有根密钥，此时生成新的根密钥），否则新哈希为None
+    """
+    secret = password.encode('utf-8')
+    decoded = _decode(encoded)
+    root_key = None
+    if decoded is not None:
+        algorithm, params, salt, digest, wrapped_root = decoded
+        stretched = _derive(secret, salt, algorithm, params)
+        if wrapped_root is None:
+            valid = hmac.compare_digest(stretched, digest)
+        else:
+            valid = hmac.compare_digest(Security.KeyHierarchy.derive(stretched, LABEL_VERIFIER), digest)
+            root_key = _unwrap_root(stretched, wrapped_root) if valid else None
+            valid = root_key is not None
+    elif len(encoded) == 64:
+        # 旧版无盐 SHA-256，只在升级前接受
+        valid = hmac.compare_digest(hashlib.sha256(secret).hexdigest(), encoded.lower())
+    else:
+        valid = False
+
+    if not valid:
+        return False, None, None
+    if root_key is None or needs_rehash(encoded):
+        # 升级时需要再拉伸一次，只发生在参数变化后的首次登录
+        root_key = root_key or os.urandom(Security.KeyHierarchy.ROOT_KEY_SIZE)
+        return True, hash_password(password, root_key=root_key), root_key
+    return True, None, root_key
+
+
+def verify_password(password: str, encoded: str):
+    """
+    验证口令
+    :param password: 口令
+    :param encoded: 数据库中保存的哈希
+    :return: (是否正确, 新哈希)；口令正确且需要升级时新哈希为按当前参数计算的结果，否则为None
+    """
+    return unlock(password, encoded)[:2]
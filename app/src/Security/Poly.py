@@ -0,0 +1,168 @@
+# 素数域 Z_p 上的多项式运算
+# 功能点：
+# 多项式以系数列表表示，从常数项开始（coefficients[i] 为 x^i 的系数）。
+# 子积树（product tree）+ 余式树实现多点求值，叶子规模以下退化为 Horner 求值。
+
+# 子积树叶子包含的求值点个数，叶子内直接用 Horner 求值
+LEAF_SIZE = 8
+
+# 求值点小于该值时 Horner 延迟取模：中间值每步只增长约 16 位，最后取模一次即可
+LAZY_REDUCTION_LIMIT = 1 << 16
+
+
+def poly_trim(f: list) -> list:
+    """去掉最高次的零系数"""
+    f = list(f)
+    while len(f) > 1 and f[-1] == 0:
+        f.pop()
+    return f
+
+
+def poly_mul(f: list, g: list, p: int = None) -> list:
+    """
+    多项式乘法（朴素算法）
+    :param p: 为None时在整数上相乘，否则结果对p取模
+    """
+    result = [0] * (len(f) + len(g) - 1)
+    for i, a in enumerate(f):
+        if a == 0:
+            continue
+        for j, b in enumerate(g):
+            result[i + j] += a * b
+    if p is not None:
+        result = [c % p for c in result]
+    return result
+
+
+def poly_divmod(f: list, g: list, p: int) -> tuple:
+    """
+    多项式带余除法 f = q * g + r（模p）
+    :return: (商, 余式)
+    """
+    g = poly_trim([c % p for c in g])
+    if g == [0]:
+        raise ZeroDivisionError("除式为零多项式")
+
+    lead_inv = pow(g[-1], -1, p)
+    m = len(g) - 1
+    r = [c % p for c in f]
+    if len(r) <= m:
+        return [0], poly_trim(r)
+
+    q = [0] * (len(r) - m)
+    for i in range(len(r) - 1, m - 1, -1):
+        c = r[i] * lead_inv % p
+        q[i - m] = c
+        if c:
+            for j in range(m + 1):
+                r[i - m + j] = (r[i - m + j] - c * g[j]) % p
+    return poly_trim(q), poly_trim(r[:m] or [0])
+
+
+def poly_rem_monic(f: list, g: list, p: int) -> list:
+    """f 对首一多项式 g 取余（无需求逆，供余式树使用）"""
+    m = len(g) - 1
+    if len(f) <= m:
+        return f
+    r = list(f)
+    for i in range(len(r) - 1, m - 1, -1):
+        c = r[i] % p
+        if c:
+            for j in range(m):
+                r[i - m + j] -= c * g[j]
+    return [c % p for c in r[:m]]
+
+
+def poly_eval(f: list, x: int, p: int) -> int:
+    """Horner 法求 f(x) mod p（小求值点延迟取模）"""
+    y = 0
+    if 0 <= x < LAZY_REDUCTION_LIMIT:
+        for coeff in reversed(f):
+            y = y * x + coeff
+        return y % p
+    for coeff in reversed(f):
+        y = (y * x + coeff) % p
+    return y
+
+
+def evaluate_many(f: list, xs: list, p: int) -> list:
+    """逐点 Horner 求值"""
+    return [poly_eval(f, x, p) for x in xs]
+
+
+def solve_linear_system(matrix: list, rhs: list, p: int):
+    """
+    模p高斯消元求解 A·v = b（自由变量取0）
+    :param matrix: 系数矩阵（行列表）
+    :param rhs: 右端向量
+    :return: 一个解向量；方程组无解时返回None
+    """
+    rows = [[c % p for c in row] + [b % p] for row, b in zip(matrix, rhs)]
+    cols = len(matrix[0]) if matrix else 0
+
+    pivots = []
+    r = 0
+    for c in range(cols):
+        pivot = next((i for i in range(r, len(rows)) if rows[i][c]), None)
+        if pivot is None:
+            continue
+        rows[r], rows[pivot] = rows[pivot], rows[r]
+
+        inv = pow(rows[r][c], -1, p)
+        rows[r] = [v * inv % p for v in rows[r]]
+        for i in range(len(rows)):
+            if i != r and rows[i][c]:
+                factor = rows[i][c]
+                rows[i] = [(a - factor * b) % p for a, b in zip(rows[i], rows[r])]
+
+        pivots.append(c)
+        r += 1
+        if r == len(rows):
+            break
+
+    # 全零行但右端非零：无解
+    if any(row[-1] for row in rows[r:]):
+        return None
+
+    solution = [0] * cols
+    for i, c in enumerate(pivots):
+        solution[c] = rows[i][-1]
+    return solution
+
+
+def build_product_tree(xs: list, leaf_size: int = LEAF_SIZE) -> tuple:
+    """
+    构建子积树，节点为 (∏(x - xi), 左子树, 右子树, 求值点)
+    树节点多项式在整数上计算：分片索引很小，系数远小于p，余式计算更快
+    """
+    if len(xs) <= leaf_size:
+        node = [1]
+        for x in xs:
+            node = poly_mul(node, [-x, 1])
+        return node, None, None, xs
+
+    mid = len(xs) // 2
+    left = build_product_tree(xs[:mid], leaf_size)
+    right = build_product_tree(xs[mid:], leaf_size)
+    return poly_mul(left[0], right[0]), left, right, xs
+
+
+def _descend(f: list, node: tuple, p: int) -> list:
+    _, left, right, xs = node
+    if left is None:
+        return [poly_eval(f, x, p) for x in xs]
+    return (_descend(poly_rem_monic(f, left[0], p), left, p)
+            + _descend(poly_rem_monic(f, right[0], p), right, p))
+
+
+def multipoint_evaluate(f: list, xs: list, p: int, leaf_size: int = LEAF_SIZE) -> list:
+    """
+    子积树多点求值：沿余式树下行，f 在每个节点对子积取余后再交给子树
+    :param f: 多项式系数（从常数项开始）
+    :param xs: 求值点
+    :return: [f(x) mod p for x in xs]
+    """
+    if not xs:
+        return []
+    tree = build_product_tree(list(xs), leaf_size)
+    return _descend(poly_rem_monic(f, tree[0], p), tree, p)
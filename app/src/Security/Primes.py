@@ -0,0 +1,149 @@
+# 素数注册表
+# 功能点：
+# 预先筛选好的素数随程序一同发布（app/res/primes.json），按位长索引，运行时无需再生成素数。
+# 加载时逐项核对条目中的 SHA-256 指纹（发现损坏），并核对整个注册表与代码中的 REGISTRY_SHA256 一致
+# （指纹写在代码里，改动 primes.json 的同时改写条目指纹也无法通过）。
+# 注册表中的素数最长 16385 位，逐个做 Miller-Rabin 会明显拖慢启动，加载时只做小素数试除。
+# 调用方可以按秘密长度取“能容纳该秘密的最小素数”，不同次分片使用相同的已知模数。
+
+import functools
+import hashlib
+import json
+import os
+import secrets
+
+REGISTRY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'res', 'primes.json'
+)
+
+# 整个注册表的 SHA-256 指纹（按位长升序，每个素数为 4 字节位长 + 大端序字节），见 registry_fingerprint
+REGISTRY_SHA256 = 'd2ef7a4ddff1b65d20ca9359c1fbddabedbb9fe3ea53b90d4d243330554719b9'
+
+# 旧版 Recovery.RecoveryInterface 中硬编码的 5500 位素数
+LEGACY_BITS = 5500
+
+_SMALL_PRIMES = [q for q in range(3, 1000, 2) if all(q % d for d in range(3, int(q ** 0.5) + 1, 2))]
+
+
+def _prime_bytes(p: int) -> bytes:
+    return p.to_bytes((p.bit_length() + 7) // 8, 'big')
+
+
+def _decode_entry(entry: dict) -> int:
+    """根据注册表条目还原素数：p = 2^base + offset 或直接给出十六进制"""
+    if 'hex' in entry:
+        return int(entry['hex'], 16)
+    return (1 << entry['base']) + entry['offset']
+
+
+def registry_fingerprint(registry: dict) -> str:
+    """
+    注册表指纹（更新 primes.json 后用它重新计算 REGISTRY_SHA256）
+    :param registry: {位长: 素数}
+    """
+    digest = hashlib.sha256()
+    for bits in sorted(registry):
+        digest.update(bits.to_bytes(4, 'big') + _prime_bytes(registry[bits]))
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def load_registry(path: str = REGISTRY_PATH, fingerprint: str = REGISTRY_SHA256) -> dict:
+    """
+    加载并校验素数注册表
+    :param path: 注册表文件路径
+    :param fingerprint: 期望的注册表指纹，为None时不核对（仅供生成新注册表时使用）
+    :return: {位长: 素数}
+    """
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"素数注册表未找到：{os.path.abspath(path)}")
+
+    registry = {}
+    for entry in data['primes']:
+        p = _decode_entry(entry)
+
+        # 指纹校验：确认与发布时筛选过的素数完全一致
+        if hashlib.sha256(_prime_bytes(p)).hexdigest() != entry['sha256']:
+            raise ValueError(f"素数注册表校验失败：{entry['name']} 指纹不匹配")
+        if any(p % q == 0 for q in _SMALL_PRIMES):
+            raise ValueError(f"素数注册表校验失败：{entry['name']} 不是素数")
+
+        registry[p.bit_length()] = p
+
+    if fingerprint is not None and registry_fingerprint(registry) != fingerprint:
+        raise ValueError("素数注册表校验失败：与程序内置的注册表指纹不一致")
+    return dict(sorted(registry.items()))
+
+
+def registered_bit_lengths() -> list:
+    """已注册素数的位长列表（升序）"""
+    return list(load_registry())
+
+
+def get_prime(bits: int) -> int:
+    """
+    按位长精确取素数
+    :param bits: 素数位长
+    :return: 注册表中该位长的素数
+    """
+    registry = load_registry()
+    if bits not in registry:
+        raise ValueError(f"素数注册表中没有 {bits} 位的素数")
+    return registry[bits]
+
+
+def prime_at_least(bits: int) -> int:
+    """取注册表中位长不小于 bits 的最小素数"""
+    for bit_length, p in load_registry().items():
+        if bit_length >= bits:
+            return p
+    raise ValueError(f"素数注册表中没有不小于 {bits} 位的素数")
+
+
+def prime_for_length(byte_length: int) -> int:
+    """
+    取能容纳指定字节长度秘密的最小素数
+    :param byte_length: 秘密字节长度
+    :return: 满足 p > 2^(8*byte_length) 的最小已注册素数
+    """
+    return prime_at_least(8 * byte_length + 1)
+
+
+def prime_for_secret(secret_bytes: bytes) -> int:
+    """取能容纳该秘密的最小素数"""
+    return prime_for_length(len(secret_bytes))
+
+
+def is_probable_prime(n: int, rounds: int = 16) -> bool:
+    """
+    Miller-Rabin 素性测试（大位长时耗时较长，供初始化或排查时使用）
+    :param n: 待测整数
+    :param rounds: 随机底数个数
+    """
+    if n < 2:
+        return False
+    for q in [2] + _SMALL_PRIMES:
+        if n % q == 0:
+            return n == q
+
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for _ in range(rounds):
+        a = secrets.randbelow(n - 3) + 2
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
@@ -0,0 +1,281 @@
+# SM4 对称加密引擎
+# 功能点：
+# 提供 CTR 与 GCM（认证加密）两种模式，优先使用 cryptography（OpenSSL）的 SM4 实现；
+# OpenSSL 未编译 SM4 时，CTR 模式退回 gmssl：整段计数器块一次送入 ECB，再按大整数异或，避免逐块调用。
+# 流式接口按大块读取，输入、输出缓冲区预先分配并反复使用（readinto / update_into），
+# 内存占用只与块大小有关。
+#
+# 密文格式：版本(1) | 模式(1) | 随机数（CTR 为16字节初始计数器，GCM 为12字节） | 密文 | 标签（仅 GCM，16字节）
+# 流式 GCM 解密在读到末尾、校验标签之前就已写出明文；校验失败会抛出 ValueError，调用方必须丢弃已写出的内容。
+
+import os
+import struct
+
+from cryptography.exceptions import InvalidTag, UnsupportedAlgorithm
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from gmssl import sm4 as gmssl_sm4
+
+VERSION = 1
+
+MODE_CTR = 'ctr'
+MODE_GCM = 'gcm'
+
+KEY_SIZE = 16
+BLOCK_SIZE = 16
+TAG_SIZE = 16
+NONCE_SIZES = {MODE_CTR: 16, MODE_GCM: 12}
+
+# 流式处理的块大小
+CHUNK_SIZE = 1024 * 1024
+
+_MODE_IDS = {MODE_CTR: 1, MODE_GCM: 2}
+_MODE_NAMES = {v: k for k, v in _MODE_IDS.items()}
+_HEADER = struct.Struct('>BB')
+
+
+def native_available() -> bool:
+    """OpenSSL 是否提供 SM4"""
+    try:
+        Cipher(algorithms.SM4(bytes(KEY_SIZE)), modes.CTR(bytes(BLOCK_SIZE))).encryptor()
+        return True
+    except UnsupportedAlgorithm:
+        return False
+
+
+_NATIVE = native_available()
+
+
+class _GmsslCTR:
+    """gmssl 实现的 SM4-CTR（计数器为128位大端整数，与 OpenSSL 结果一致）"""
+
+    def __init__(self, key: bytes, nonce: bytes):
+        self._cipher = gmssl_sm4.CryptSM4(gmssl_sm4.SM4_ENCRYPT, padding_mode=None)
+        self._cipher.set_key(key, gmssl_sm4.SM4_ENCRYPT)
+        self._counter = int.from_bytes(nonce, 'big')
+        self._keystream = b''
+
+    def update(self, data) -> bytes:
+        needed = len(data) - len(self._keystream)
+        if needed > 0:
+            blocks = -(-needed // BLOCK_SIZE)
+            counters = b''.join(((self._counter + i) % (1 << 128)).to_bytes(BLOCK_SIZE, 'big')
+                                for i in range(blocks))
+            self._counter = (self._counter + blocks) % (1 << 128)
+            self._keystream += self._cipher.crypt_ecb(counters)
+
+        stream, self._keystream = self._keystream[:len(data)], self._keystream[len(data):]
+        mixed = int.from_bytes(data, 'big') ^ int.from_bytes(stream, 'big')
+        return mixed.to_bytes(len(data), 'big')
+
+    def update_into(self, data, buf) -> int:
+        out = self.update(data)
+        buf[:len(out)] = out
+        return len(out)
+
+    def finalize(self) -> bytes:
+        return b''
+
+
+def _cryptor(key: bytes, mode: str, nonce: bytes, encrypt: bool, tag: bytes = None):
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"SM4 密钥长度必须为{KEY_SIZE}字节")
+    if mode == MODE_CTR:
+        if not _NATIVE:
+            return _GmsslCTR(key, nonce)
+        cipher = Cipher(algorithms.SM4(key), modes.CTR(nonce))
+    elif mode == MODE_GCM:
+        if not _NATIVE:
+            raise ValueError("当前 OpenSSL 不支持 SM4，GCM 模式不可用")
+        cipher = Cipher(algorithms.SM4(key), modes.GCM(nonce, tag))
+    else:
+        raise ValueError(f"不支持的 SM4 模式：{mode}")
+    return cipher.encryptor() if encrypt else cipher.decryptor()
+
+
+def generate_key() -> bytes:
+    """生成 SM4 密钥"""
+    return os.urandom(KEY_SIZE)
+
+
+def encrypt(data: bytes, key: bytes, mode: str = MODE_GCM, aad: bytes = None) -> bytes:
+    """
+    SM4 加密
+    :param data: 明文
+    :param key: 16字节密钥
+    :param mode: MODE_CTR 或 MODE_GCM
+    :param aad: 附加认证数据（仅 GCM）
+    :return: 密文（含版本、模式、随机数，GCM 含标签）
+    """
+    if mode not in _MODE_IDS:
+        raise ValueError(f"不支持的 SM4 模式：{mode}")
+    nonce = os.urandom(NONCE_SIZES[mode])
+    encryptor = _cryptor(key, mode, nonce, True)
+    if mode == MODE_GCM and aad:
+        encryptor.authenticate_additional_data(aad)
+
+    body = encryptor.update(data) + encryptor.finalize()
+    tag = encryptor.tag if mode == MODE_GCM else b''
+    return _HEADER.pack(VERSION, _MODE_IDS[mode]) + nonce + body + tag
+
+
+def _parse_header(header: bytes) -> str:
+    version, mode_id = _HEADER.unpack(header)
+    if version != VERSION or mode_id not in _MODE_NAMES:
+        raise ValueError("不是有效的 SM4 密文")
+    return _MODE_NAMES[mode_id]
+
+
+def decrypt(blob: bytes, key: bytes, aad: bytes = None) -> bytes:
+    """
+    SM4 解密
+    :param blob: encrypt 生成的密文
+    :param key: 16字节密钥
+    :param aad: 附加认证数据（仅 GCM，须与加密时一致）
+    :return: 明文
+    """
+    if len(blob) < _HEADER.size:
+        raise ValueError("不是有效的 SM4 密文")
+    mode = _parse_header(blob[:_HEADER.size])
+    offset = _HEADER.size + NONCE_SIZES[mode]
+    tag_size = TAG_SIZE if mode == MODE_GCM else 0
+    if len(blob) < offset + tag_size:
+        raise ValueError("SM4 密文不完整")
+
+    nonce = blob[_HEADER.size:offset]
+    body = blob[offset:len(blob) - tag_size]
+    tag = blob[len(blob) - tag_size:] if tag_size else None
+
+    decryptor = _cryptor(key, mode, nonce, False, tag)
+    if mode == MODE_GCM and aad:
+        decryptor.authenticate_additional_data(aad)
+    try:
+        return decryptor.update(body) + decryptor.finalize()
+    except InvalidTag:
+        raise ValueError("SM4 认证失败，密文已损坏或密钥错误")
+
+
+def _open(target, mode: str):
+    """路径则打开文件，流原样返回；返回 (流, 是否需要关闭)"""
+    if isinstance(target, (str, os.PathLike)):
+        return open(target, mode), True
+    return target, False
+
+
+def _readinto(source, view) -> int:
+    """尽量读满 view，返回读到的字节数（0 表示结束）"""
+    total = 0
+    while total < len(view):
+        if hasattr(source, 'readinto'):
+            n = source.readinto(view[total:])
+        else:
+            data = source.read(len(view) - total)
+            n = len(data)
+            view[total:total + n] = data
+        if not n:
+            break
+        total += n
+    return total
+
+
+def encrypt_stream(source, sink, key: bytes, mode: str = MODE_GCM, aad: bytes = None,
+                   chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    SM4 流式加密（输入、输出缓冲区预分配并复用）
+    :param source: 明文文件路径或可读二进制流
+    :param sink: 密文文件路径或可写二进制流
+    :return: 明文字节数
+    """
+    if mode not in _MODE_IDS:
+        raise ValueError(f"不支持的 SM4 模式：{mode}")
+    nonce = os.urandom(NONCE_SIZES[mode])
+    encryptor = _cryptor(key, mode, nonce, True)
+    if mode == MODE_GCM and aad:
+        encryptor.authenticate_additional_data(aad)
+
+    in_buffer = bytearray(chunk_size)
+    in_view = memoryview(in_buffer)
+    out_buffer = bytearray(chunk_size + BLOCK_SIZE - 1)
+    out_view = memoryview(out_buffer)
+
+    src, close_src = _open(source, 'rb')
+    dst, close_dst = _open(sink, 'wb')
+    try:
+        dst.write(_HEADER.pack(VERSION, _MODE_IDS[mode]) + nonce)
+        total = 0
+        while True:
+            n = _readinto(src, in_view)
+            if not n:
+                break
+            written = encryptor.update_into(in_view[:n], out_buffer)
+            dst.write(out_view[:written])
+            total += n
+        dst.write(encryptor.finalize())
+        if mode == MODE_GCM:
+            dst.write(encryptor.tag)
+        return total
+    finally:
+        if close_src:
+            src.close()
+        if close_dst:
+            dst.close()
+
+
+def decrypt_stream(source, sink, key: bytes, aad: bytes = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    SM4 流式解密（GCM 时末尾16字节为标签，始终保留在缓冲区中直到读完）
+    :param source: 密文文件路径或可读二进制流
+    :param sink: 明文文件路径或可写二进制流
+    :return: 明文字节数
+    """
+    src, close_src = _open(source, 'rb')
+    dst, close_dst = _open(sink, 'wb')
+    try:
+        header = src.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError("不是有效的 SM4 密文")
+        mode = _parse_header(header)
+        nonce = src.read(NONCE_SIZES[mode])
+        if len(nonce) != NONCE_SIZES[mode]:
+            raise ValueError("SM4 密文不完整")
+
+        # 标签在流末尾，GCM 解密器先不带标签创建，读完后用 finalize_with_tag 校验
+        tag_size = TAG_SIZE if mode == MODE_GCM else 0
+        decryptor = _cryptor(key, mode, nonce, False)
+        if mode == MODE_GCM and aad:
+            decryptor.authenticate_additional_data(aad)
+
+        in_buffer = bytearray(chunk_size + tag_size)
+        in_view = memoryview(in_buffer)
+        out_buffer = bytearray(chunk_size + BLOCK_SIZE - 1)
+        out_view = memoryview(out_buffer)
+
+        held = 0  # 缓冲区开头保留的尾部字节数（可能是标签）
+        total = 0
+        while True:
+            n = _readinto(src, in_view[held:held + chunk_size])
+            available = held + n
+            ready = max(0, available - tag_size)
+            if ready:
+                written = decryptor.update_into(in_view[:ready], out_buffer)
+                dst.write(out_view[:written])
+                total += ready
+                in_buffer[:available - ready] = in_buffer[ready:available]
+            held = available - ready
+            if not n:
+                break
+
+        if mode == MODE_GCM:
+            if held != TAG_SIZE:
+                raise ValueError("SM4 密文不完整")
+            try:
+                dst.write(decryptor.finalize_with_tag(bytes(in_buffer[:TAG_SIZE])))
+            except InvalidTag:
+                raise ValueError("SM4 认证失败，密文已损坏或密钥错误")
+        else:
+            dst.write(decryptor.finalize())
+        return total
+    finally:
+        if close_src:
+            src.close()
+        if close_dst:
+            dst.close()
@@ -20,28 +20,55 @@ class Splits:
     split5=""
 
 
+import functools
 import hashlib
+import hmac
 import secrets
+import struct
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import rsa
 
+import Security.Backend
+import Security.GF256
+import Security.Poly
+import Security.Primes
+
+# 分片运算所在的有限域
+FIELD_PRIME = 'prime'  # 大素数域，整个秘密作为一个整数
+FIELD_GF256 = 'gf256'  # GF(2^8)，按字节查表运算
+
+# 分片完整性标签算法
+TAG_LEGACY = 'sha256-dec'  # 旧版：对十进制字符串 "x:y" 做 SHA-256（仅用于校验旧分片）
+TAG_SHA256 = 'sha256'  # 对二进制分片字节做 SHA-256
+TAG_HMAC = 'hmac-sha256'  # 对二进制分片字节做 HMAC-SHA256，可发现篡改
+
+# 拉格朗日基系数缓存容量（按 素数 + 分片索引组合 缓存）
+LAGRANGE_CACHE_SIZE = 128
+
 
 def generate_safe_prime(bit_length: int = 2048):
-    """生成安全素数（RSA素数生成方法）"""
-    return rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=bit_length,
-        backend=default_backend()
-    ).private_numbers().p
+    """取素数注册表中不小于 bit_length 位的最小素数（不再于运行时生成）"""
+    return Security.Primes.prime_at_least(bit_length)
 
 
-def split_secret(secret_bytes: bytes, n: int, k: int, p: int):
+def split_secret(secret_bytes: bytes, n: int, k: int, p: int = None, field: str = FIELD_PRIME,
+                 key: bytes = None):
     """
     完整分片生成（含哈希计算）
+    :param p: 素数，为None时从素数注册表中选取能容纳秘密的最小素数
+    :param field: 运算域，FIELD_PRIME 使用素数p，FIELD_GF256 按字节运算且无需p
+    :param key: HMAC密钥，给出时分片标签为 HMAC-SHA256，否则为 SHA-256
     :return: 包含索引、分片值、哈希值、原始长度的分片列表
     """
+    if field == FIELD_GF256:
+        return _split_secret_gf256(secret_bytes, n, k, key)
+    if field != FIELD_PRIME:
+        raise ValueError(f"不支持的运算域：{field}")
+
     if k < 1 or n < k:
         raise ValueError("无效的分片参数")
+    if p is None:
+        p = Security.Primes.prime_for_secret(secret_bytes)
 
     s = int.from_bytes(secret_bytes, byteorder='big')
     if s >= p:
@@ -51,75 +78,409 @@ def split_secret(secret_bytes: bytes, n: int, k: int, p: int):
     # 生成分片索引
     indices = list(range(1, n + 1))
 
-    # 生成多项式系数
-    coefficients = [s] + [secrets.randbelow(p) for _ in range(k - 1)]
+    # 生成多项式系数（按当前大整数后端运算）
+    to_number = Security.Backend.to_number
+    coefficients = [to_number(s)] + [to_number(secrets.randbelow(p)) for _ in range(k - 1)]
+    modulus = to_number(p)
 
     shares = []
     for x in indices:
-        # 计算分片值y = f(x)
-        y = 0
-        for coeff in reversed(coefficients):
-            y = (y * x + coeff) % p
+        # 计算分片值y = f(x)，分片中始终保存内置 int
+        y = Security.Backend.to_int(evaluate_polynomial(coefficients, x, modulus))
+        shares.append(build_share(x, y, len(secret_bytes), FIELD_PRIME, key))
+
+    return shares
+
+
+def share_bytes(x: int, y) -> bytes:
+    """
+    分片的二进制表示：4字节大端索引 + 分片值字节
+    整数分片值按最短大端字节编码，线性时间，无需转换为十进制字符串
+    """
+    if isinstance(y, int):
+        y = y.to_bytes((y.bit_length() + 7) // 8, 'big')
+    return struct.pack('>I', x) + bytes(y)
+
 
-        # 生成分片数据并计算哈希（修复hashes生成）
+def share_hash(x: int, y, key: bytes = None) -> str:
+    """
+    计算分片标签
+    :param key: HMAC密钥，为None时使用 SHA-256
+    """
+    if key is None:
+        return hashlib.sha256(share_bytes(x, y)).hexdigest()
+    return hmac.new(key, share_bytes(x, y), hashlib.sha256).hexdigest()
+
+
+def _legacy_share_hash(x: int, y) -> str:
+    """旧版分片哈希（十进制字符串），仅用于校验未记录标签算法的旧分片"""
+    if isinstance(y, int):
         share_data = f"{x}:{y}".encode('utf-8')
-        share_hash = hashlib.sha256(share_data).hexdigest()  # 计算分片哈希
+    else:
+        share_data = f"{x}:{bytes(y).hex()}".encode('utf-8')
+    return hashlib.sha256(share_data).hexdigest()
 
-        shares.append({
-            'index': x,
-            'share': y,
-            'hash': share_hash,  # 存储哈希值
-            'original_length': len(secret_bytes)  # 存储原始秘密长度
-        })
 
-    return shares
+def build_share(x: int, y, original_length: int, field: str = FIELD_PRIME, key: bytes = None) -> dict:
+    """组装单个分片（含哈希值与原始长度）"""
+    return {
+        'index': x,
+        'share': y,
+        'hash': share_hash(x, y, key),  # 存储哈希值
+        'hash_alg': TAG_SHA256 if key is None else TAG_HMAC,
+        'original_length': original_length,  # 存储原始秘密长度
+        'field': field
+    }
 
 
-def recover_secret(shares: list, p: int, k: int):
+def verify_shares(shares: list, key: bytes = None) -> list:
     """
-    完整秘密恢复（含动态字节长度计算）
-    :return: 恢复的秘密字节数据
+    批量校验分片标签
+    HMAC 的密钥处理只做一次，每个分片复制已初始化的状态后再计算
+    :param shares: 分片字典列表
+    :param key: HMAC密钥；HMAC 标签的分片在未提供密钥时视为无效，
+                提供密钥时只接受 HMAC 标签（防止把分片改标为 SHA-256 并重算哈希的降级篡改）
+    :return: 与 shares 一一对应的校验结果
     """
-    # 验证分片有效性
-    valid_shares = []
+    keyed = hmac.new(key, digestmod=hashlib.sha256) if key is not None else None
+
+    results = []
     for share in shares:
         x = share['index']
         y = share['share']
-        data = f"{x}:{y}".encode('utf-8')
-        if hashlib.sha256(data).hexdigest() != share['hash']:
-            continue  # 跳过无效分片
-        valid_shares.append((x, y))
+        alg = share.get('hash_alg', TAG_LEGACY)
+        if keyed is not None and alg != TAG_HMAC:
+            results.append(False)
+            continue
+
+        if alg == TAG_SHA256:
+            expected = hashlib.sha256(share_bytes(x, y)).hexdigest()
+        elif alg == TAG_HMAC:
+            if keyed is None:
+                results.append(False)
+                continue
+            mac = keyed.copy()
+            mac.update(share_bytes(x, y))
+            expected = mac.hexdigest()
+        elif alg == TAG_LEGACY:
+            expected = _legacy_share_hash(x, y)
+        else:
+            results.append(False)
+            continue
+
+        results.append(hmac.compare_digest(expected, share['hash']))
+    return results
+
+
+def evaluate_polynomial(coefficients: list, x: int, p: int) -> int:
+    """Horner 法求 f(x) mod p，coefficients 从常数项开始"""
+    y = 0
+    for coeff in reversed(coefficients):
+        y = (y * x + coeff) % p
+    return y
+
+
+def _split_secret_gf256(secret_bytes: bytes, n: int, k: int, key: bytes = None):
+    """GF(2^8) 分片，分片值为与秘密等长的字节串"""
+    return [
+        build_share(x, y, len(secret_bytes), FIELD_GF256, key)
+        for x, y in Security.GF256.split_bytes(secret_bytes, n, k)
+    ]
+
+
+def recover_secret(shares: list, p: int, k: int, field: str = FIELD_PRIME, key: bytes = None):
+    """
+    完整秘密恢复（含动态字节长度计算）
+    :param p: 素数，为None时按原始长度从素数注册表中选取（与分片时的默认选择一致）
+    :param field: 运算域，需与分片时一致；FIELD_GF256 时p可为None
+    :param key: HMAC密钥，分片使用 HMAC 标签时必须提供
+    :return: 恢复的秘密字节数据
+    """
+    if field == FIELD_GF256:
+        return _recover_secret_gf256(shares, k, key)
+    if field != FIELD_PRIME:
+        raise ValueError(f"不支持的运算域：{field}")
+
+    # 验证分片有效性（跳过无效分片）
+    valid_shares = [
+        (share['index'], share['share'])
+        for share, valid in zip(shares, verify_shares(shares, key)) if valid
+    ]
 
     if len(valid_shares) < k:
         raise ValueError("有效分片数量不足")
 
-    # 动态计算字节长度
-    max_secret = p - 1
-    byte_length = (max_secret.bit_length() + 7) // 8
+    # 取前k个有效分片，按索引排序以便相同持有人组合命中系数缓存
+    valid_shares = sorted(valid_shares[:k])
+    xs = tuple(x for x, _ in valid_shares)
+    if len(set(xs)) != len(xs):
+        raise ValueError("分片索引重复")
+
+    original_length = shares[0]['original_length']
+    if p is None:
+        p = Security.Primes.prime_for_length(original_length)
+
+    # 拉格朗日插值（按当前大整数后端运算）
+    to_number = Security.Backend.to_number
+    modulus = to_number(p)
+    secret = to_number(0)
+    for (_, yi), l in zip(valid_shares, lagrange_coefficients(xs, p)):
+        secret = (secret + to_number(yi) * to_number(l)) % modulus
+    secret = Security.Backend.to_int(secret)
+
+    # 转换为字节：秘密小于 2^(8*原始长度)，直接按原始长度还原以保留前导零字节
+    try:
+        return secret.to_bytes(original_length, 'big')
+    except OverflowError:
+        raise ValueError("恢复结果超出原始长度，分片与素数可能不匹配")
+
+
+def batch_inverse(values: list, p: int) -> list:
+    """
+    Montgomery 批量求逆：只做一次模逆，其余均为模乘
+    :param values: 模p下非零的整数列表
+    :return: 与 values 一一对应的逆元列表（内置 int）
+    """
+    if not values:
+        return []
+
+    # 前缀积 prefix[i] = values[0] * ... * values[i]（按当前大整数后端运算）
+    p = Security.Backend.to_number(p)
+    prefix = []
+    acc = Security.Backend.to_number(1)
+    for v in values:
+        acc = acc * v % p
+        prefix.append(acc)
+
+    inv = Security.Backend.invert(acc, p)  # 唯一一次模逆元计算
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = inv * prefix[i - 1] % p
+        inv = inv * values[i] % p
+    inverses[0] = inv
+    return [Security.Backend.to_int(v) for v in inverses]
+
 
-    # 拉格朗日插值
-    secret = 0
-    for i, (xi, yi) in enumerate(valid_shares):
-        l = 1
-        for j, (xj, _) in enumerate(valid_shares):
+@functools.lru_cache(maxsize=LAGRANGE_CACHE_SIZE)
+def lagrange_coefficients(xs: tuple, p: int) -> tuple:
+    """
+    计算 x=0 处的拉格朗日基系数（带LRU缓存）
+    :param xs: 互不相同的分片索引（元组，作为缓存键）
+    :param p: 素数
+    :return: 与 xs 一一对应的系数
+    """
+    numerators = []
+    denominators = []
+    for i, xi in enumerate(xs):
+        numerator = 1
+        denominator = 1
+        for j, xj in enumerate(xs):
             if i == j:
                 continue
-            l = (l * (-xj)) % p
-            l = (l * pow(xi - xj, -1, p)) % p  # 模逆元计算
-        secret = (secret + yi * l) % p
+            numerator = numerator * (-xj) % p
+            denominator = denominator * (xi - xj) % p
+        numerators.append(numerator)
+        denominators.append(denominator)
+
+    inverses = batch_inverse(denominators, p)
+    return tuple(num * inv % p for num, inv in zip(numerators, inverses))
+
+
+def _recover_secret_gf256(shares: list, k: int, key: bytes = None):
+    """GF(2^8) 秘密恢复"""
+    valid_shares = [
+        (share['index'], share['share'])
+        for share, valid in zip(shares, verify_shares(shares, key)) if valid
+    ]
+
+    if len(valid_shares) < k:
+        raise ValueError("有效分片数量不足")
+
+    recovered_bytes = Security.GF256.recover_bytes(valid_shares[:k])
+    return recovered_bytes[:shares[0]['original_length']]
+
+
+def recover_secret_robust(shares: list, p: int, k: int, key: bytes = None):
+    """
+    纠错恢复（Berlekamp-Welch 解码，仅素数域）
+    给定 m > k 个分片时，在多项式时间内容忍至多 (m-k)/2 个内容错误的分片
+    （例如旧版本分片或来自其他分片批次的分片），并指出错误分片。
+    :param shares: 分片字典列表
+    :param p: 素数，为None时按原始长度从素数注册表中选取
+    :param k: 恢复阈值
+    :param key: HMAC密钥
+    :return: (恢复的秘密字节数据, 错误分片索引列表)
+    """
+    if any(share.get('field', FIELD_PRIME) != FIELD_PRIME for share in shares):
+        raise ValueError("纠错恢复仅支持素数域分片")
 
-    # 转换为字节并截断原始长度
-    recovered_bytes = secret.to_bytes(byte_length, 'big')
     original_length = shares[0]['original_length']
-    return recovered_bytes[:original_length]
+    if p is None:
+        p = Security.Primes.prime_for_length(original_length)
 
+    # 标签校验失败的分片直接判为错误分片
+    bad_indices = []
+    points = []
+    for share, valid in zip(shares, verify_shares(shares, key)):
+        if valid:
+            points.append((share['index'], share['share'] % p))
+        else:
+            bad_indices.append(share['index'])
 
-def start_verify():
-    # 生成16384位安全素数
-    p = generate_safe_prime(16384)
+    xs = [x for x, _ in points]
+    if len(set(xs)) != len(xs):
+        raise ValueError("分片索引重复")
+
+    m = len(points)
+    if m < k:
+        raise ValueError("有效分片数量不足")
+    e = (m - k) // 2  # 可纠正的错误分片数量上限
+
+    # 未知数：Q(x) 的 k+e 个系数，首一错误定位多项式 E(x) 的低 e 个系数
+    # 方程：Q(x_i) - y_i * (e_0 + ... + e_{e-1} x_i^{e-1}) = y_i * x_i^e
+    matrix = []
+    rhs = []
+    for x, y in points:
+        powers = [pow(x, j, p) for j in range(k + e + 1)]
+        matrix.append(powers[:k + e] + [(-y * powers[j]) % p for j in range(e)])
+        rhs.append(y * powers[e] % p)
+
+    solution = Security.Poly.solve_linear_system(matrix, rhs, p)
+    if solution is None:
+        raise ValueError("错误分片过多，无法纠错恢复")
 
+    q = solution[:k + e]
+    locator = solution[k + e:] + [1]
+    polynomial, remainder = Security.Poly.poly_divmod(q, locator, p)
+    if remainder != [0] or len(polynomial) > k:
+        raise ValueError("错误分片过多，无法纠错恢复")
+
+    wrong = [x for x, y in points if Security.Poly.poly_eval(polynomial, x, p) != y]
+    if len(wrong) > e:
+        raise ValueError("错误分片过多，无法纠错恢复")
+    bad_indices.extend(wrong)
+
+    try:
+        secret = polynomial[0].to_bytes(original_length, 'big')
+    except OverflowError:
+        raise ValueError("恢复结果超出原始长度，分片与素数可能不匹配")
+    return secret, sorted(bad_indices)
+
+
+def split_many(secret_list: list, n: int, k: int, p: int = None, field: str = FIELD_PRIME,
+               key: bytes = None) -> list:
+    """
+    批量分片：多个秘密共用 (n, k)，按持有人打包
+    :param secret_list: 秘密字节列表
+    :param p: 素数，为None时按最长秘密从素数注册表中选取
+    :param field: 运算域
+    :param key: HMAC密钥
+    :return: n 个分片包，每个持有人一个，包内含全部秘密在该索引处的分片值
+    """
+    if k < 1 or n < k:
+        raise ValueError("无效的分片参数")
+    lengths = [len(secret) for secret in secret_list]
+
+    if field == FIELD_GF256:
+        # 所有秘密拼接后一次性按字节求值，再按长度切分
+        points = Security.GF256.split_bytes(b''.join(secret_list), n, k)
+    elif field == FIELD_PRIME:
+        if p is None:
+            p = Security.Primes.prime_for_length(max(lengths, default=0))
+        values = [int.from_bytes(secret, 'big') for secret in secret_list]
+        if any(s >= p for s in values):
+            raise ValueError("秘密值超过素数p的范围")
+
+        # 系数矩阵：每行对应一个秘密的多项式
+        polynomials = [[s] + [secrets.randbelow(p) for _ in range(k - 1)] for s in values]
+
+        # 每个索引只算一次 x 的各次幂，所有多项式共用（索引很小，幂无需取模）
+        width = (p.bit_length() + 7) // 8
+        points = []
+        for x in range(1, n + 1):
+            powers = [x ** j for j in range(k)]
+            ys = [sum(c * e for c, e in zip(poly, powers)) % p for poly in polynomials]
+            points.append((x, ys))
+    else:
+        raise ValueError(f"不支持的运算域：{field}")
+
+    bundles = []
+    for x, y in points:
+        data = y if field == FIELD_GF256 else b''.join(v.to_bytes(width, 'big') for v in y)
+        bundles.append({
+            'index': x,
+            'share': y,
+            'hash': share_hash(x, data, key),
+            'hash_alg': TAG_SHA256 if key is None else TAG_HMAC,
+            'lengths': lengths,
+            'field': field
+        })
+    return bundles
+
+
+def recover_many(bundles: list, k: int, p: int = None, key: bytes = None) -> list:
+    """
+    批量恢复
+    :param bundles: split_many 生成的分片包（至少k个）
+    :param p: 素数，为None时按最长秘密从素数注册表中选取（与分片时的默认选择一致）
+    :param key: HMAC密钥，分片包使用 HMAC 标签时必须提供
+    :return: 与分片时顺序一致的秘密字节列表
+    """
+    field = bundles[0]['field'] if bundles else FIELD_PRIME
+    lengths = bundles[0]['lengths'] if bundles else []
+    if p is None and field == FIELD_PRIME:
+        p = Security.Primes.prime_for_length(max(lengths, default=0))
+
+    # 验证分片包有效性
+    valid_bundles = []
+    for bundle in bundles:
+        if bundle['field'] != field or bundle['lengths'] != lengths:
+            continue  # 跳过来自其他批次的分片包
+        y = bundle['share']
+        if field == FIELD_PRIME:
+            width = (p.bit_length() + 7) // 8
+            data = b''.join(v.to_bytes(width, 'big') for v in y)
+        else:
+            data = y
+        if not verify_shares([{'index': bundle['index'], 'share': data,
+                               'hash': bundle['hash'], 'hash_alg': bundle['hash_alg']}], key)[0]:
+            continue  # 跳过无效分片包
+        valid_bundles.append(bundle)
+
+    if len(valid_bundles) < k:
+        raise ValueError("有效分片数量不足")
+    valid_bundles = sorted(valid_bundles[:k], key=lambda b: b['index'])
+
+    if field == FIELD_GF256:
+        joined = Security.GF256.recover_bytes([(b['index'], b['share']) for b in valid_bundles])
+        secret_list = []
+        offset = 0
+        for length in lengths:
+            secret_list.append(joined[offset:offset + length])
+            offset += length
+        return secret_list
+
+    xs = tuple(b['index'] for b in valid_bundles)
+    if len(set(xs)) != len(xs):
+        raise ValueError("分片索引重复")
+    coefficients = lagrange_coefficients(xs, p)
+
+    secret_list = []
+    for i, length in enumerate(lengths):
+        secret = sum(b['share'][i] * l for b, l in zip(valid_bundles, coefficients)) % p
+        try:
+            secret_list.append(secret.to_bytes(length, 'big'))
+        except OverflowError:
+            raise ValueError("恢复结果超出原始长度，分片与素数可能不匹配")
+    return secret_list
+
+
+def start_verify():
     # 生成测试秘密（1024字节）
     secret = secrets.token_bytes(1024)
+
+    # 从素数注册表选取能容纳秘密的最小素数
+    p = Security.Primes.prime_for_secret(secret)
     print("secret:",secret)
     # 生成5个分片（阈值3）
     shares = split_secret(secret, n=5, k=3, p=p)
@@ -0,0 +1,152 @@
+# 紧凑二进制分片格式
+# 功能点：
+# 固定文件头（版本、运算域、索引、阈值、秘密长度）+ 可选 HMAC 标签 + 大端序分片字节 + CRC32 校验和。
+# 比字典/十进制文本小得多，适合写入U盘、打印和云端存储。
+# Share 类使用 __slots__，解析时以 memoryview 切片引用原始缓冲区，不复制分片数据。
+# CRC32 只能发现意外损坏；分片以 HMAC 密钥生成时保存 HMAC-SHA256 标签，恢复时用同一密钥校验以发现篡改。
+#
+# 二进制布局（大端序）：
+#   版本 2：版本(1) | 运算域编号(1) | 索引(2) | 阈值(2) | 秘密长度(4) | 标签长度(1) | 标签 | 分片字节(变长) | CRC32(4)
+#   版本 1：版本(1) | 运算域编号(1) | 索引(2) | 阈值(2) | 秘密长度(4) | 分片字节(变长) | CRC32(4)（无标签，只读）
+
+import base64
+import struct
+import zlib
+
+import Security.SSS
+
+VERSION = 2
+_VERSION_UNTAGGED = 1
+
+# HMAC-SHA256 标签长度
+TAG_SIZE = 32
+
+_HEADER = struct.Struct('>BBHHI')
+_TAG_LENGTH = struct.Struct('>B')
+_CHECKSUM = struct.Struct('>I')
+
+FIELD_IDS = {Security.SSS.FIELD_PRIME: 0, Security.SSS.FIELD_GF256: 1}
+FIELD_NAMES = {v: k for k, v in FIELD_IDS.items()}
+
+
+class Share:
+    """单个分片的二进制表示"""
+
+    __slots__ = ('version', 'field', 'index', 'threshold', 'secret_length', 'payload', 'tag')
+
+    def __init__(self, field: str, index: int, threshold: int, secret_length: int,
+                 payload, version: int = VERSION, tag: bytes = None):
+        self.version = version
+        self.field = field
+        self.index = index
+        self.threshold = threshold
+        self.secret_length = secret_length
+        self.payload = payload  # bytes 或指向原始缓冲区的 memoryview
+        self.tag = tag  # HMAC-SHA256 标签，分片未使用 HMAC 密钥时为None
+
+    def __repr__(self):
+        return (f"Share(field={self.field!r}, index={self.index}, threshold={self.threshold}, "
+                f"secret_length={self.secret_length}, payload={len(self.payload)} bytes)")
+
+    @property
+    def value(self):
+        """分片值：素数域为整数，GF(2^8) 为字节串"""
+        if self.field == Security.SSS.FIELD_PRIME:
+            return int.from_bytes(self.payload, 'big')
+        return bytes(self.payload)
+
+    @classmethod
+    def parse(cls, data) -> 'Share':
+        """
+        解析二进制分片（零拷贝）
+        :param data: bytes / bytearray / memoryview / mmap
+        :return: Share，payload 为原始缓冲区上的 memoryview 切片
+        """
+        view = memoryview(data)
+        if len(view) < _HEADER.size + _CHECKSUM.size:
+            raise ValueError("分片数据过短")
+
+        (checksum,) = _CHECKSUM.unpack_from(view, len(view) - _CHECKSUM.size)
+        if zlib.crc32(view[:-_CHECKSUM.size]) != checksum:
+            raise ValueError("分片校验和不匹配")
+
+        version, field_id, index, threshold, secret_length = _HEADER.unpack_from(view)
+        if version not in (VERSION, _VERSION_UNTAGGED):
+            raise ValueError(f"不支持的分片格式版本：{version}")
+        if field_id not in FIELD_NAMES:
+            raise ValueError(f"不支持的运算域编号：{field_id}")
+
+        offset = _HEADER.size
+        tag = None
+        if version == VERSION:
+            (tag_length,) = _TAG_LENGTH.unpack_from(view, offset)
+            offset += _TAG_LENGTH.size
+            if tag_length not in (0, TAG_SIZE) or offset + tag_length > len(view) - _CHECKSUM.size:
+                raise ValueError("分片标签长度无效")
+            tag = bytes(view[offset:offset + tag_length]) or None
+            offset += tag_length
+
+        return cls(FIELD_NAMES[field_id], index, threshold, secret_length,
+                   view[offset:-_CHECKSUM.size], version, tag)
+
+    def encode(self) -> bytes:
+        """编码为二进制分片（始终使用当前版本）"""
+        tag = self.tag or b''
+        body = (_HEADER.pack(VERSION, FIELD_IDS[self.field], self.index, self.threshold, self.secret_length)
+                + _TAG_LENGTH.pack(len(tag)) + tag + bytes(self.payload))
+        return body + _CHECKSUM.pack(zlib.crc32(body))
+
+    def encode_text(self) -> str:
+        """编码为 URL 安全的 Base64 文本（便于打印或生成二维码）"""
+        return base64.urlsafe_b64encode(self.encode()).decode('ascii').rstrip('=')
+
+    @classmethod
+    def parse_text(cls, text: str) -> 'Share':
+        """解析 encode_text 生成的文本"""
+        text = text.strip()
+        try:
+            data = base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+        except ValueError as e:
+            raise ValueError(f"分片文本解码失败：{str(e)}") from e
+        return cls.parse(data)
+
+    @classmethod
+    def from_dict(cls, share: dict, threshold: int, p: int = None) -> 'Share':
+        """
+        由 Security.SSS 的分片字典构建
+        :param share: split_secret 生成的分片（HMAC 标签随分片保存）
+        :param threshold: 恢复阈值k
+        :param p: 素数域的素数，给出时分片字节按素数宽度定长编码
+        """
+        tag = None
+        if share.get('hash_alg') == Security.SSS.TAG_HMAC:
+            tag = bytes.fromhex(share['hash'])
+        field = share.get('field', Security.SSS.FIELD_PRIME)
+        y = share['share']
+        if field == Security.SSS.FIELD_PRIME:
+            width = (p.bit_length() + 7) // 8 if p is not None else max(1, (y.bit_length() + 7) // 8)
+            payload = y.to_bytes(width, 'big')
+        else:
+            payload = bytes(y)
+        return cls(field, share['index'], threshold, share['original_length'], payload, tag=tag)
+
+    def to_dict(self) -> dict:
+        """
+        转换为 Security.SSS.recover_secret 可用的分片字典
+        有 HMAC 标签时原样带出，由 recover_secret 用密钥校验；无标签的分片只能以不带密钥的方式恢复
+        """
+        share = Security.SSS.build_share(self.index, self.value, self.secret_length, self.field)
+        if self.tag is not None:
+            share['hash'] = self.tag.hex()
+            share['hash_alg'] = Security.SSS.TAG_HMAC
+        return share
+
+
+def encode_shares(shares: list, threshold: int, p: int = None) -> list:
+    """批量编码分片字典"""
+    return [Share.from_dict(share, threshold, p).encode() for share in shares]
+
+
+def parse_shares(buffers: list) -> list:
+    """批量解析二进制分片"""
+    return [Share.parse(data) for data in buffers]
@@ -0,0 +1,253 @@
+# 流式分块 Shamir 分片
+# 功能点：
+# 输入可为本地文件路径（内存映射读取）或任意二进制流，按固定大小分块。
+# 每块独立分片后立即写入 n 个分片流，内存占用只与块大小有关，与文件大小无关。
+# 恢复时同时读取 k 个分片流，逐块重组并写出秘密。
+# 与 Security.Share 相同，每块带校验标签：默认 CRC32（发现意外损坏），给出 HMAC 密钥时为 HMAC-SHA256（发现篡改）。
+# 标签覆盖分片索引、块序号与块长度，块被改写、调换顺序或换到其他分片流时恢复报错；流末尾的结束块防止截断。
+#
+# 分片流格式（版本 2）：
+#   文件头：魔数 | 版本 | 运算域 | 分片索引 | 阈值 | 块大小 | 素数位长（GF(2^8) 时为0） | 标签类型
+#   数据块：原始块长度（4字节） | 分片字节（GF(2^8) 与原始块等长，素数域为素数的字节宽度） | 标签
+#   结束块：长度 0 | 标签
+# 版本 1 没有标签类型、标签与结束块，只在不带密钥时读取。
+
+import contextlib
+import hashlib
+import hmac
+import mmap
+import os
+import secrets
+import struct
+import zlib
+
+import Security.GF256
+import Security.Primes
+import Security.SSS
+
+MAGIC = b'PVSS'
+VERSION = 2
+_VERSION_UNTAGGED = 1
+
+# 标签类型
+TAG_CRC32 = 0
+TAG_HMAC = 1
+_TAG_SIZES = {TAG_CRC32: 4, TAG_HMAC: 32}
+
+# 默认块大小：GF(2^8) 可用较大块；素数域的块必须能放进注册表中的素数
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_PRIME_BLOCK_SIZE = 1024
+
+_HEADER = struct.Struct('>4sBBHHIH')
+_TAG_KIND = struct.Struct('>B')
+_BLOCK_LENGTH = struct.Struct('>I')
+# 标签覆盖的块标识：分片索引 | 块序号 | 原始块长度
+_BLOCK_ID = struct.Struct('>HQI')
+
+_FIELD_IDS = {Security.SSS.FIELD_PRIME: 0, Security.SSS.FIELD_GF256: 1}
+_FIELD_NAMES = {v: k for k, v in _FIELD_IDS.items()}
+
+
+def _iter_blocks(source, block_size: int):
+    """按块读取输入：文件路径使用内存映射，其余按二进制流读取"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset in range(0, size, block_size):
+                    yield mm[offset:offset + block_size]
+    else:
+        while True:
+            block = source.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+def _open_all(stack: contextlib.ExitStack, targets: list, mode: str) -> list:
+    """路径则打开文件（随 ExitStack 关闭），已打开的流原样使用"""
+    return [
+        stack.enter_context(open(t, mode)) if isinstance(t, (str, os.PathLike)) else t
+        for t in targets
+    ]
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("分片流意外结束")
+    return data
+
+
+def _block_tag(key: bytes, x: int, block_number: int, length: int, y: bytes) -> bytes:
+    """块标签：有密钥时为 HMAC-SHA256，否则为 CRC32"""
+    block_id = _BLOCK_ID.pack(x, block_number, length)
+    if key is None:
+        return struct.pack('>I', zlib.crc32(y, zlib.crc32(block_id)))
+    return hmac.new(key, block_id + y, hashlib.sha256).digest()
+
+
+def split_stream(source, sinks: list, k: int,
+                 block_size: int = None, field: str = Security.SSS.FIELD_GF256, key: bytes = None) -> int:
+    """
+    流式分片
+    :param source: 待分片的文件路径或二进制流
+    :param sinks: n 个分片输出（文件路径或可写二进制流）
+    :param k: 恢复阈值
+    :param block_size: 块大小（字节），默认按运算域选择
+    :param field: 运算域，默认 GF(2^8)
+    :param key: 块标签的HMAC密钥，为None时使用 CRC32
+    :return: 已处理的秘密字节数
+    """
+    n = len(sinks)
+    if k < 1 or n < k:
+        raise ValueError("无效的分片参数")
+    if field not in _FIELD_IDS:
+        raise ValueError(f"不支持的运算域：{field}")
+
+    if block_size is None:
+        block_size = DEFAULT_BLOCK_SIZE if field == Security.SSS.FIELD_GF256 else DEFAULT_PRIME_BLOCK_SIZE
+
+    p = None
+    prime_bits = 0
+    if field == Security.SSS.FIELD_PRIME:
+        p = Security.Primes.prime_for_length(block_size)
+        prime_bits = p.bit_length()
+        share_width = (prime_bits + 7) // 8
+
+    total = 0
+    with contextlib.ExitStack() as stack:
+        outputs = _open_all(stack, sinks, 'wb')
+        tag_kind = TAG_CRC32 if key is None else TAG_HMAC
+        for x, out in enumerate(outputs, start=1):
+            out.write(_HEADER.pack(MAGIC, VERSION, _FIELD_IDS[field], x, k, block_size, prime_bits)
+                      + _TAG_KIND.pack(tag_kind))
+
+        block_number = 0
+        for block in _iter_blocks(source, block_size):
+            length = _BLOCK_LENGTH.pack(len(block))
+
+            if field == Security.SSS.FIELD_GF256:
+                points = Security.GF256.split_bytes(block, n, k)
+            else:
+                s = int.from_bytes(block, 'big')
+                coefficients = [s] + [secrets.randbelow(p) for _ in range(k - 1)]
+                points = [
+                    (x, Security.SSS.evaluate_polynomial(coefficients, x, p).to_bytes(share_width, 'big'))
+                    for x in range(1, n + 1)
+                ]
+
+            for (x, y), out in zip(points, outputs):
+                out.write(length)
+                out.write(y)
+                out.write(_block_tag(key, x, block_number, len(block), y))
+            total += len(block)
+            block_number += 1
+
+        # 结束块
+        for x, out in enumerate(outputs, start=1):
+            out.write(_BLOCK_LENGTH.pack(0))
+            out.write(_block_tag(key, x, block_number, 0, b''))
+
+    return total
+
+
+def recover_stream(sources: list, sink, key: bytes = None) -> int:
+    """
+    流式恢复
+    :param sources: 至少 k 个分片输入（文件路径或二进制流）
+    :param sink: 秘密输出（文件路径或可写二进制流）
+    :param key: 分片时使用的HMAC密钥；给出时只接受带 HMAC 标签的分片流
+    :return: 已写出的秘密字节数
+    """
+    with contextlib.ExitStack() as stack:
+        inputs = _open_all(stack, sources, 'rb')
+
+        headers = [_HEADER.unpack(_read_exact(s, _HEADER.size)) for s in inputs]
+        for magic, version, *_ in headers:
+            if magic != MAGIC or version not in (VERSION, _VERSION_UNTAGGED):
+                raise ValueError("不是有效的分片流")
+        if len({(h[1], h[2], h[4], h[5], h[6]) for h in headers}) != 1:
+            raise ValueError("分片流参数不一致，可能来自不同的分片")
+
+        tagged = headers[0][1] == VERSION
+        if tagged:
+            tag_kinds = {_TAG_KIND.unpack(_read_exact(s, _TAG_KIND.size))[0] for s in inputs}
+            if len(tag_kinds) != 1 or not tag_kinds <= set(_TAG_SIZES):
+                raise ValueError("分片流标签类型无效或不一致")
+            tag_kind = tag_kinds.pop()
+            tag_size = _TAG_SIZES[tag_kind]
+            if key is not None and tag_kind != TAG_HMAC:
+                raise ValueError("分片流缺少HMAC标签")
+            if key is None and tag_kind == TAG_HMAC:
+                raise ValueError("分片流带有HMAC标签，恢复时需要提供密钥")
+        elif key is not None:
+            raise ValueError("分片流缺少HMAC标签")
+
+        _, _, field_id, _, k, block_size, prime_bits = headers[0]
+        field = _FIELD_NAMES.get(field_id)
+        if field is None:
+            raise ValueError(f"不支持的运算域编号：{field_id}")
+
+        indices = [h[3] for h in headers]
+        if len(set(indices)) != len(indices):
+            raise ValueError("分片索引重复")
+        if len(inputs) < k:
+            raise ValueError("有效分片数量不足")
+
+        # 只需前k个分片流
+        indices = indices[:k]
+        inputs = inputs[:k]
+
+        p = None
+        if field == Security.SSS.FIELD_PRIME:
+            p = Security.Primes.get_prime(prime_bits)
+            share_width = (prime_bits + 7) // 8
+            coefficients = Security.SSS.lagrange_coefficients(tuple(indices), p)
+
+        def read_share(x, s, block_number, length, width):
+            y = _read_exact(s, width)
+            if tagged and not hmac.compare_digest(_read_exact(s, tag_size),
+                                                  _block_tag(key, x, block_number, length, y)):
+                raise ValueError(f"分片 {x} 的第 {block_number + 1} 块校验失败，分片流已损坏或被篡改")
+            return y
+
+        output = _open_all(stack, [sink], 'wb')[0]
+        total = 0
+        block_number = 0
+        while True:
+            lengths = [s.read(_BLOCK_LENGTH.size) for s in inputs]
+            if not any(lengths):
+                if tagged:
+                    raise ValueError("分片流缺少结束块，可能被截断")
+                break
+            if len(set(lengths)) != 1 or len(lengths[0]) != _BLOCK_LENGTH.size:
+                raise ValueError("分片流块长度不一致")
+            (length,) = _BLOCK_LENGTH.unpack(lengths[0])
+            if length > block_size:
+                raise ValueError("分片流块长度超过块大小")
+            if tagged and length == 0:
+                for x, s in zip(indices, inputs):
+                    read_share(x, s, block_number, 0, 0)
+                break
+
+            if field == Security.SSS.FIELD_GF256:
+                points = [(x, read_share(x, s, block_number, length, length)) for x, s in zip(indices, inputs)]
+                block = Security.GF256.recover_bytes(points)
+            else:
+                secret = 0
+                for x, s, l in zip(indices, inputs, coefficients):
+                    y = int.from_bytes(read_share(x, s, block_number, length, share_width), 'big')
+                    secret = (secret + y * l) % p
+                try:
+                    block = secret.to_bytes(length, 'big')
+                except OverflowError:
+                    raise ValueError("恢复结果超出块长度，分片流可能不匹配")
+
+            output.write(block)
+            total += length
+            block_number += 1
+
+    return total
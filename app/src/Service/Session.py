@@ -0,0 +1,217 @@
+# 会话管理
+# 功能点：
+# 登录后取出用户封装的数据密钥解封一次，整个会话复用同一个 ColumnCipher。
+# 已解锁（Security.KeyHierarchy）时数据密钥由列子密钥以 AES-GCM 封装，解封无需RSA私钥；
+# 仍由RSA封装的旧数据密钥在首次解锁后改为列子密钥封装。
+# 另存一份RSA封装的恢复副本：忘记口令时根密钥随新口令改变，列子密钥封装无法解开，
+# 由分片恢复RSA私钥后用恢复副本取回数据密钥，再以新的列子密钥重新封装。
+# 令牌值在数据库中以 AES-256-GCM 密文保存，读取分两种方式：
+#   reveal：用户点开某个恢复码时才解密，明文放入容量有限的 LRU，重复查看不再解密；
+#   decrypt_all：导出时批量解密，结果直接交给调用方，不进入 LRU。
+# 打开含上千条令牌的保险箱只需一次密钥解封，解密次数等于用户实际查看的条数。
+# 旧版以明文保存的令牌值在打开会话时一次性重新加密（见 VaultSession.encrypt_legacy_tokens）。
+# 锁定或退出时调用 end_session，清空数据密钥与明文缓存。
+
+import collections
+import threading
+
+import Security.Crypto
+import Security.KeyHierarchy
+
+TOKEN_COLUMN = 'tokens.token_value'
+DATA_KEY_COLUMN = 'data_keys.wrapped_key'
+
+# 列子密钥封装格式：魔数(4) | 随机数(12) | 密文 + 标签(16)，RSA 封装的长度为模长，二者不会混淆
+_SUBKEY_WRAP_MAGIC = b'PVKW'
+_SUBKEY_WRAP_SIZE = len(_SUBKEY_WRAP_MAGIC) + Security.Crypto.COLUMN_NONCE_SIZE + Security.Crypto.COLUMN_KEY_SIZE + 16
+
+# 明文 LRU 容量（条）
+REVEAL_CACHE_SIZE = 32
+
+
+class VaultSession:
+    """持有数据密钥与明文 LRU 的会话"""
+
+    def __init__(self, user_id: int, data_key: bytes, cache_size: int = REVEAL_CACHE_SIZE):
+        """
+        :param user_id: 用户ID
+        :param data_key: 解封后的数据密钥
+        :param cache_size: 明文 LRU 容量，为0时不缓存
+        """
+        self.user_id = user_id
+        self.cache_size = cache_size
+        self._cipher = Security.Crypto.ColumnCipher(data_key)
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, courier, user_id: int, wrapping_key: bytes = None,
+             cache_size: int = REVEAL_CACHE_SIZE) -> 'VaultSession':
+        """
+        打开会话：读取并解封数据密钥，用户还没有数据密钥时生成一把并保存
+        :param courier: 已连接的 Database.Courier.MariaDBCourier
+        :param user_id: 用户ID
+        :param wrapping_key: 列子密钥（Security.KeyHierarchy.LABEL_COLUMN），为None时使用RSA封装
+        """
+        wrapped = courier.get_data_key(user_id)
+        if wrapped is None:
+            data_key = Security.Crypto.ColumnCipher.generate_data_key()
+            if courier.store_data_key(user_id, _wrap(data_key, user_id, wrapping_key),
+                                      Security.Crypto.Asymmetric.wrap_data_key(data_key)):
+                return cls(user_id, data_key, cache_size)
+            # 其他会话已抢先写入，以数据库中的为准
+            wrapped = courier.get_data_key(user_id)
+            if wrapped is None:
+                raise RuntimeError("数据密钥保存失败")
+
+        if _is_subkey_wrapped(wrapped):
+            data_key = None
+            if wrapping_key is not None:
+                try:
+                    data_key = Security.Crypto.Symmetric.aes_decryption(
+                        wrapped[len(_SUBKEY_WRAP_MAGIC):], wrapping_key, _wrap_context(user_id))
+                except ValueError:
+                    # 口令已重置，根密钥与封装时不同
+                    pass
+            if data_key is None:
+                recovery_key = courier.get_recovery_key(user_id)
+                if recovery_key is None:
+                    raise ValueError("数据密钥由列子密钥封装且没有恢复副本，需要先解锁")
+                data_key = Security.Crypto.Asymmetric.unwrap_data_key(recovery_key)
+                if wrapping_key is not None:
+                    courier.update_data_key(user_id, _wrap(data_key, user_id, wrapping_key))
+        else:
+            data_key = Security.Crypto.Asymmetric.unwrap_data_key(wrapped)
+            if wrapping_key is not None:
+                # 原RSA封装保留为恢复副本
+                courier.update_data_key(user_id, _wrap(data_key, user_id, wrapping_key), wrapped)
+        return cls(user_id, data_key, cache_size)
+
+    @property
+    def cipher(self) -> Security.Crypto.ColumnCipher:
+        """会话的列加密器，会话结束后不可用"""
+        if self._cipher is None:
+            raise ValueError("会话已结束")
+        return self._cipher
+
+    def _context(self, token_name: str) -> bytes:
+        return Security.Crypto.ColumnCipher.context(TOKEN_COLUMN, self.user_id, token_name)
+
+    def encrypt_token(self, token_name: str, value: str) -> bytes:
+        """
+        加密令牌值，结果用于 MariaDBCourier.add_token
+        :param token_name: 令牌名（参与认证，密文不能挪到其他令牌）
+        :param value: 明文
+        """
+        return self.cipher.encrypt(value, self._context(token_name))
+
+    def encrypt_legacy_tokens(self, courier) -> int:
+        """
+        把旧版以明文保存的令牌值加密后写回（已加密的不变）
+        既不是列密文也不是 UTF-8 文本的值保持原样，读取时由 decrypt/decrypt_all 报告“不是有效的列密文”
+        :param courier: 已连接的 Database.Courier.MariaDBCourier
+        :return: 重新加密的条数
+        """
+        count = 0
+        for token_id, token_name, token_value, *_ in courier.list_tokens(self.user_id):
+            if Security.Crypto.ColumnCipher.is_ciphertext(token_value):
+                continue
+            try:
+                value = token_value.decode('utf-8')
+            except UnicodeDecodeError:
+                continue
+            if courier.update_token_value(token_id, self.encrypt_token(token_name, value)):
+                count += 1
+        return count
+
+    def reveal(self, token_id: int, token_name: str, token_value: bytes) -> str:
+        """
+        解密单个令牌值（命中 LRU 时不解密）
+        :param token_id: 令牌ID（缓存键）
+        :param token_name: 令牌名
+        :param token_value: 数据库中的密文
+        :return: 明文
+        """
+        with self._lock:
+            if token_id in self._cache:
+                self._cache.move_to_end(token_id)
+                return self._cache[token_id]
+
+        value = self.cipher.decrypt(token_value, self._context(token_name))
+        if self.cache_size:
+            with self._lock:
+                self._cache[token_id] = value
+                self._cache.move_to_end(token_id)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return value
+
+    def forget(self, token_id: int = None):
+        """从 LRU 中移除一条明文，token_id 为None时全部移除"""
+        with self._lock:
+            if token_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(token_id, None)
+
+    def decrypt_all(self, rows: list) -> list:
+        """
+        批量解密（导出用，不写入 LRU）
+        :param rows: MariaDBCourier.list_tokens 的结果
+        :return: 与 rows 顺序一致的 (明文, 错误) 列表
+        """
+        return self.cipher.decrypt_many([(row[2], self._context(row[1])) for row in rows])
+
+    def close(self):
+        """丢弃数据密钥与明文缓存"""
+        self.forget()
+        self._cipher = None
+
+
+def _wrap_context(user_id: int) -> bytes:
+    return Security.Crypto.ColumnCipher.context(DATA_KEY_COLUMN, user_id)
+
+
+def _is_subkey_wrapped(wrapped: bytes) -> bool:
+    return len(wrapped) == _SUBKEY_WRAP_SIZE and wrapped.startswith(_SUBKEY_WRAP_MAGIC)
+
+
+def _wrap(data_key: bytes, user_id: int, wrapping_key: bytes = None) -> bytes:
+    """有列子密钥时用 AES-GCM 封装，否则用RSA公钥封装"""
+    if wrapping_key is None:
+        return Security.Crypto.Asymmetric.wrap_data_key(data_key)
+    return _SUBKEY_WRAP_MAGIC + Security.Crypto.Symmetric.aes_encryption(data_key, wrapping_key,
+                                                                          _wrap_context(user_id))
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def start_session(courier, user_id: int) -> VaultSession:
+    """打开并设为当前会话（替换已有会话）；已解锁时使用列子密钥封装数据密钥"""
+    global _current
+    wrapping_key = None
+    if Security.KeyHierarchy.is_unlocked():
+        wrapping_key = Security.KeyHierarchy.subkey(Security.KeyHierarchy.LABEL_COLUMN)
+    session = VaultSession.open(courier, user_id, wrapping_key)
+    session.encrypt_legacy_tokens(courier)
+    with _current_lock:
+        previous, _current = _current, session
+    if previous is not None:
+        previous.close()
+    return session
+
+
+def current_session():
+    """当前会话，未登录时返回None"""
+    return _current
+
+
+def end_session():
+    """结束当前会话"""
+    global _current
+    with _current_lock:
+        previous, _current = _current, None
+    if previous is not None:
+        previous.close()
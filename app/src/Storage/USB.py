@@ -127,6 +127,22 @@ def write_key(mount_point, split_key:str):
         f.write(f"创建时间: {time.ctime()}\n")
 
 
+def write_share(mount_point, share_bytes: bytes, index: int):
+    """将二进制分片（Security.Share 编码）写入U盘"""
+    share_file = os.path.join(mount_point, f"shamir_split_{index}.pvs")
+
+    with open(share_file, 'wb') as f:
+        f.write(share_bytes)
+
+    return share_file
+
+
+def read_share(share_file) -> bytes:
+    """从U盘读取二进制分片"""
+    with open(share_file, 'rb') as f:
+        return f.read()
+
+
 def main():
     print("=== U盘文件读写操作 ===")
 
@@ -1,7 +1,8 @@
 import os
 
+from PySide6 import QtCore
+
 import Core.Controller
-import Core.FileDigester
 import Config.Locale
 import Log.DevelopLogger
 import Log.SetupLogger
@@ -14,6 +15,10 @@ def config_folder_detection():
     else:
         exit('Cannot_find_config')
 
+def start_key_pool():
+    import Security.KeyPool
+    Security.KeyPool.start_refill()
+
 def developer_info():
     Log.DevelopLogger.developer_info('User locale is '+Config.Locale.GetSystemLang.get_lang())
     Log.DevelopLogger.developer_info('User language is '+Config.Locale.load_locale(Config.Locale.GetSystemLang.get_lang()))
@@ -27,5 +32,7 @@ if __name__ == '__main__':
     Core.Controller.WindowManager.init_app()
     # Core.Controller.WindowManager.show_main()
     Core.Controller.WindowManager.show_login()
+    # 登录窗口显示后再加载加密模块并在后台预生成密钥对，注册时无需等待
+    QtCore.QTimer.singleShot(0, start_key_pool)
     Core.Controller.WindowManager._app.exec()
 
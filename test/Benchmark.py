@@ -0,0 +1,275 @@
+# 性能基准测试
+# 功能点：
+# 覆盖 Shamir 分片/恢复（不同秘密长度、素数、(n, k)、运算域）、RSA 加解密、PBKDF2/scrypt 口令哈希、
+# SM4 与 AES-GCM 吞吐量、令牌列加解密、Fernet 配置读写。
+# 每项取多轮测量中的最小单次耗时，结果保存为 JSON，并与已提交的基线比较，
+# 超过阈值（默认慢 25%）且绝对差值超过最小差值时视为性能回退，进程以非零状态退出。
+#
+# 用法（在仓库根目录）：
+#   python test/Benchmark.py                       # 与基线比较
+#   python test/Benchmark.py --update-baseline     # 重新生成基线
+#   python test/Benchmark.py --threshold 0.5 --filter sss.
+#
+# Security.Crypto、Database.Gatekeeper 与日志模块在导入时即按当前工作目录确定 key/、config/、log/ 路径，
+# 因此先切换到临时工作目录再导入，不会改动仓库中的密钥与配置。
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'app', 'src')
+BASELINE_PATH = os.path.join(ROOT, 'test', 'benchmark_baseline.json')
+
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5
+# 每轮测量的最短时间（秒），不足时增加调用次数
+MIN_ROUND_TIME = 0.1
+# 亚毫秒级的项受系统抖动影响较大，绝对差值小于该值（秒）时不视为回退
+DEFAULT_MIN_DELTA = 5e-5
+
+
+def measure(func, repeat: int = DEFAULT_REPEAT) -> float:
+    """
+    测量单次调用耗时
+    :param func: 无参数的可调用对象
+    :param repeat: 测量轮数
+    :return: 各轮中最小的单次耗时（秒）
+    """
+    # 校准每轮调用次数
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_ROUND_TIME or number >= 1 << 20:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def sss_cases():
+    """Shamir 分片与恢复"""
+    import Security.Primes
+    import Security.SSS
+
+    cases = []
+    for length in (32, 256, 680):
+        secret = os.urandom(length)
+        primes = [('auto', None), ('legacy', Security.Primes.get_prime(Security.Primes.LEGACY_BITS))]
+        for prime_name, p in primes:
+            for n, k in ((5, 3), (10, 6), (32, 16)):
+                label = f'{length}B,p={prime_name},n={n},k={k}'
+                shares = Security.SSS.split_secret(secret, n, k, p)
+
+                def recover(shares=shares, p=p, k=k):
+                    # 清空系数缓存，测量完整插值开销
+                    Security.SSS.lagrange_coefficients.cache_clear()
+                    Security.SSS.recover_secret(shares, p, k)
+
+                cases.append((f'sss.split[{label}]', lambda s=secret, n=n, k=k, p=p: Security.SSS.split_secret(s, n, k, p)))
+                cases.append((f'sss.recover[{label}]', recover))
+
+    for length in (1024, 64 * 1024):
+        secret = os.urandom(length)
+        field = Security.SSS.FIELD_GF256
+        shares = Security.SSS.split_secret(secret, 5, 3, field=field)
+        cases.append((f'sss.split[{length}B,gf256,n=5,k=3]',
+                      lambda s=secret: Security.SSS.split_secret(s, 5, 3, field=field)))
+        cases.append((f'sss.recover[{length}B,gf256,n=5,k=3]',
+                      lambda shares=shares: Security.SSS.recover_secret(shares, None, 3, field=field)))
+    return cases
+
+
+def crypto_cases():
+    """RSA 加解密、口令哈希（固定参数，不受本机校准结果影响）"""
+    import Security.Crypto
+    import Security.Password
+
+    if not Security.Crypto.Asymmetric.rsa_keygen('benchmark'):
+        raise RuntimeError("RSA 密钥生成失败")
+    message = 'benchmark message'
+    cipher = Security.Crypto.Asymmetric.rsa_encryption(message)
+    Security.Crypto.Asymmetric.x25519_keygen('benchmark')
+    ecies_cipher = Security.Crypto.Asymmetric.ecies_encryption(message)
+    payload = os.urandom(1024 * 1024)
+    envelope = Security.Crypto.Asymmetric.envelope_encryption(payload)
+
+    return [
+        ('crypto.rsa_encrypt', lambda: Security.Crypto.Asymmetric.rsa_encryption(message)),
+        ('crypto.rsa_decrypt', lambda: Security.Crypto.Asymmetric.rsa_decryption(cipher)),
+        ('crypto.ecies_encrypt', lambda: Security.Crypto.Asymmetric.ecies_encryption(message)),
+        ('crypto.ecies_decrypt', lambda: Security.Crypto.Asymmetric.ecies_decryption(ecies_cipher)),
+        ('crypto.decrypt_many[64]', lambda: Security.Crypto.Asymmetric.decrypt_many([cipher] * 64)),
+        ('crypto.envelope_encrypt[1MB]', lambda: Security.Crypto.Asymmetric.envelope_encryption(payload)),
+        ('crypto.envelope_decrypt[1MB]', lambda: Security.Crypto.Asymmetric.envelope_decryption(envelope)),
+        ('crypto.password_hash[pbkdf2,i=100000]', lambda: Security.Password.hash_password(
+            'benchmark-password', {'algorithm': Security.Password.ALGORITHM_PBKDF2, 'params': {'i': 100000}})),
+        ('crypto.password_hash[scrypt,ln=14]', lambda: Security.Password.hash_password(
+            'benchmark-password', {'algorithm': Security.Password.ALGORITHM_SCRYPT,
+                                   'params': {'ln': 14, 'r': 8, 'p': 1}})),
+        # 会覆盖上面 ECIES 用例使用的密钥文件，必须放在最后
+        ('crypto.x25519_keygen', lambda: Security.Crypto.Asymmetric.x25519_keygen('benchmark')),
+    ]
+
+
+def cipher_cases():
+    """SM4（CTR、GCM、流式）与 AES-GCM 吞吐量对比，令牌列加解密"""
+    import io
+
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    import Security.Crypto
+    import Security.SM4
+    import Service.Session
+
+    payload = os.urandom(1024 * 1024)
+    sm4_key = Security.SM4.generate_key()
+    aes = AESGCM(AESGCM.generate_key(bit_length=256))
+    nonce = os.urandom(12)
+    sealed = Security.SM4.encrypt(payload, sm4_key)
+
+    session = Service.Session.VaultSession(1, Security.Crypto.ColumnCipher.generate_data_key())
+    rows = [(i, f'token-{i}', session.encrypt_token(f'token-{i}', f'{i:08d}'), 'SHA1', 6, 30) for i in range(1000)]
+
+    def stream(mode):
+        Security.SM4.encrypt_stream(io.BytesIO(payload), io.BytesIO(), sm4_key, mode, chunk_size=256 * 1024)
+
+    return [
+        ('cipher.sm4_ctr_encrypt[1MB]', lambda: Security.SM4.encrypt(payload, sm4_key, Security.SM4.MODE_CTR)),
+        ('cipher.sm4_gcm_encrypt[1MB]', lambda: Security.SM4.encrypt(payload, sm4_key, Security.SM4.MODE_GCM)),
+        ('cipher.sm4_gcm_decrypt[1MB]', lambda: Security.SM4.decrypt(sealed, sm4_key)),
+        ('cipher.sm4_gcm_stream[1MB]', lambda: stream(Security.SM4.MODE_GCM)),
+        ('cipher.aes_gcm_encrypt[1MB]', lambda: aes.encrypt(nonce, payload, None)),
+        ('cipher.column_decrypt_all[1000]', lambda: session.decrypt_all(rows)),
+        ('cipher.column_reveal[cached]', lambda: session.reveal(*rows[0][:3])),
+    ]
+
+
+def config_cases():
+    """Fernet 加密配置读写"""
+    import Database.Gatekeeper
+
+    config = {'host': 'localhost', 'port': 3306, 'user': 'vault', 'password': 'benchmark', 'database': 'vault'}
+    Database.Gatekeeper.save_config(config)
+    return [
+        ('config.fernet_save', lambda: Database.Gatekeeper.save_config(config)),
+        ('config.fernet_load', Database.Gatekeeper.load_config),
+    ]
+
+
+def run(names_filter: str = None, repeat: int = DEFAULT_REPEAT) -> dict:
+    """运行全部基准测试，返回 {名称: 单次耗时}"""
+    results = {}
+    for group in (sss_cases, crypto_cases, cipher_cases, config_cases):
+        for name, func in group():
+            if names_filter and names_filter not in name:
+                continue
+            results[name] = measure(func, repeat)
+            print(f'{name:<50} {results[name] * 1000:>12.4f} ms')
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float = DEFAULT_MIN_DELTA) -> list:
+    """
+    与基线比较
+    :return: 回退项列表 [(名称, 基线耗时, 当前耗时), ...]
+    """
+    regressions = []
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f'{name:<50} 基线中不存在，跳过比较')
+            continue
+        ratio = seconds / reference
+        flag = '回退' if ratio > 1 + threshold and seconds - reference > min_delta else ''
+        print(f'{name:<50} {ratio:>8.2f}x {flag}')
+        if flag:
+            regressions.append((name, reference, seconds))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Security 模块性能基准测试')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线 JSON 路径')
+    parser.add_argument('--output', help='保存本次结果的 JSON 路径')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='允许的相对变慢比例，超过即视为回退（默认0.25）')
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA,
+                        help='视为回退所需的最小绝对差值（秒，默认5e-5）')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='每项测量轮数')
+    parser.add_argument('--filter', dest='names_filter', help='只运行名称包含该字符串的项')
+    parser.add_argument('--update-baseline', action='store_true', help='用本次结果覆盖基线')
+    args = parser.parse_args(argv)
+
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    sys.path.insert(0, SRC)
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        for sub in ('log', 'key', 'config'):
+            os.makedirs(os.path.join(workdir, sub))
+        os.chdir(workdir)
+        try:
+            results = run(args.names_filter, args.repeat)
+        finally:
+            os.chdir(previous_cwd)
+
+    import Security.Backend
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'bigint_backend': Security.Backend.get_backend(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        # 只运行了部分项时合并进已有基线
+        if args.names_filter and os.path.exists(baseline_path):
+            with open(baseline_path, encoding='utf-8') as f:
+                report['results'] = {**json.load(f)['results'], **results}
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f'基线已更新：{baseline_path}')
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f'基线文件不存在：{baseline_path}，请先使用 --update-baseline 生成')
+        return 1
+
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    if regressions:
+        print(f'\n{len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）：')
+        for name, reference, seconds in regressions:
+            print(f'  {name}: {reference * 1000:.4f} ms -> {seconds * 1000:.4f} ms')
+        return 1
+    print('\n未发现性能回退')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,7 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 import Storage.Printer
 import Storage.USB
 import Security.Crypto
+import Security.Primes
 import Security.SSS
 import Recovery.RecoveryInterface
 
@@ -62,15 +63,42 @@ def shamir_test():
     #     shares=shares)
 
 
-def generate_safe_prime(bit_length):
-    """生成安全素数（实际为RSA素数生成方法）"""
+def gf256_shamir_test():
+    secret = os.urandom(1024)
+    shares = Security.SSS.split_secret(secret, n=5, k=3, field=Security.SSS.FIELD_GF256)
+    recovered = Security.SSS.recover_secret(shares[2:], None, 3, field=Security.SSS.FIELD_GF256)
+    assert secret == recovered, "GF(2^8) 秘密恢复不一致！"
+    print("GF(2^8) 分片验证成功，分片长度：", len(shares[0]['share']))
+    return True
+
+
+def hmac_downgrade_test():
+    """改标为 SHA-256 并重算哈希的分片在提供密钥时必须被拒绝"""
+    import hashlib
+
+    key = os.urandom(32)
+    secret = os.urandom(32)
+    shares = Security.SSS.split_secret(secret, n=5, k=3, key=key)
 
-    return rsa.generate_private_key(
+    forged = dict(shares[0], share=(shares[0]['share'] + 1))
+    forged['hash_alg'] = Security.SSS.TAG_SHA256
+    forged['hash'] = hashlib.sha256(Security.SSS.share_bytes(forged['index'], forged['share'])).hexdigest()
+    # 去掉 hash_alg 后按旧版格式重算标签：不带密钥时是有效的旧分片
+    stripped = {k: v for k, v in forged.items() if k != 'hash_alg'}
+    stripped['hash'] = hashlib.sha256(f"{stripped['index']}:{stripped['share']}".encode()).hexdigest()
+
+    assert Security.SSS.verify_shares([forged, stripped]) == [True, True]
+    assert Security.SSS.verify_shares([forged, stripped], key) == [False, False], "降级分片未被拒绝！"
+    recovered = Security.SSS.recover_secret([forged] + shares[1:4], None, 3, key=key)
+    assert recovered == secret, "降级分片参与了恢复！"
+    print("HMAC 降级分片已拒绝")
+    return True
+
+
+def generate_safe_prime(bit_length):
+    """从素数注册表取不小于 bit_length 位的最小素数"""
 
-        public_exponent=65537,
-        key_size=bit_length,
-        backend=default_backend()
-    ).private_numbers().p
+    return Security.Primes.prime_at_least(bit_length)
 
 
 def usb_test():
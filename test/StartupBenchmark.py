@@ -0,0 +1,148 @@
+# 启动时间基准测试
+# 功能点：
+# 1. 以 python -X importtime 导入 main，统计导入总耗时并列出累计耗时最高的顶层模块；
+# 2. 在 QT_QPA_PLATFORM=offscreen 下启动子进程，测量从进程启动到登录窗口显示（处理完首轮事件）的时间；
+# 3. 检查首个窗口出现时是否已加载了应延迟加载的模块（mariadb、Security.Crypto、其他窗口等）。
+# 任一耗时超出预算或延迟模块被提前加载时，进程以非零状态退出。
+#
+# 用法（在仓库根目录）：
+#   python test/StartupBenchmark.py
+#   python test/StartupBenchmark.py --import-budget 0.3 --window-budget 1.0 --top 15
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'app', 'src')
+
+# 预算（秒）
+DEFAULT_IMPORT_BUDGET = 0.5
+DEFAULT_WINDOW_BUDGET = 1.5
+DEFAULT_REPEAT = 5
+DEFAULT_TOP = 10
+
+# 登录窗口出现前不应加载的模块
+DEFERRED_MODULES = (
+    'mariadb',
+    'Database.Courier',
+    'Security.Crypto',
+    'Security.KeyPool',
+    'Gui.MainInterface',
+    'Gui.SetupInterface',
+    'Recovery.RecoveryInterface',
+)
+
+# 子进程：显示登录窗口，处理首轮事件后输出已加载的延迟模块并退出
+_FIRST_WINDOW_SCRIPT = f'''
+import json, sys
+import Core.Controller
+Core.Controller.WindowManager.init_app()
+Core.Controller.WindowManager.show_login()
+Core.Controller.WindowManager._app.processEvents()
+print(json.dumps(sorted(m for m in {DEFERRED_MODULES!r} if m in sys.modules)))
+'''
+
+
+def _errors(result: subprocess.CompletedProcess) -> str:
+    """子进程错误输出（去掉 -X importtime 的统计行）"""
+    return '\n'.join(line for line in result.stderr.splitlines() if not line.startswith('import time:'))
+
+
+def _run(args: list, workdir: str, env: dict = None) -> subprocess.CompletedProcess:
+    environment = {**os.environ, 'PYTHONPATH': SRC, **(env or {})}
+    return subprocess.run([sys.executable, *args], cwd=workdir, env=environment,
+                          capture_output=True, text=True)
+
+
+def import_profile(workdir: str, repeat: int = DEFAULT_REPEAT):
+    """
+    导入 main 的耗时
+    :return: (最小导入总耗时（秒）, 该次的顶层模块列表 [(模块, 累计耗时（秒）), ...])
+    """
+    best = None
+    for _ in range(repeat):
+        result = _run(['-X', 'importtime', '-c', 'import main'], workdir)
+        if result.returncode != 0:
+            raise RuntimeError(f"导入 main 失败：\n{_errors(result)}")
+
+        total = 0
+        top_level = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            total += int(self_us)
+            # 顶层导入的模块名前没有缩进
+            if not name[1:].startswith(' '):
+                top_level.append((name.strip(), int(cumulative_us) / 1e6))
+        if best is None or total / 1e6 < best[0]:
+            best = (total / 1e6, sorted(top_level, key=lambda item: item[1], reverse=True))
+    return best
+
+
+def first_window(workdir: str, repeat: int = DEFAULT_REPEAT):
+    """
+    从进程启动到登录窗口显示的时间（含解释器启动）
+    :return: (最小耗时（秒）, 窗口出现时已加载的延迟模块列表)
+    """
+    best, loaded = None, []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = _run(['-c', _FIRST_WINDOW_SCRIPT], workdir, {'QT_QPA_PLATFORM': 'offscreen'})
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(f"显示登录窗口失败：\n{_errors(result)}")
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best, loaded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='启动时间基准测试')
+    parser.add_argument('--import-budget', type=float, default=DEFAULT_IMPORT_BUDGET,
+                        help='导入 main 的耗时预算（秒，默认0.5）')
+    parser.add_argument('--window-budget', type=float, default=DEFAULT_WINDOW_BUDGET,
+                        help='显示登录窗口的耗时预算（秒，默认1.5）')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='测量次数，取最小值')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='列出累计耗时最高的顶层模块数')
+    args = parser.parse_args(argv)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # 日志模块在导入时即打开 log/ 下的文件
+        for sub in ('log', 'key', 'config'):
+            os.makedirs(os.path.join(workdir, sub))
+
+        try:
+            import_seconds, modules = import_profile(workdir, args.repeat)
+            window_seconds, loaded = first_window(workdir, args.repeat)
+        except RuntimeError as e:
+            print(e)
+            return 1
+
+    print(f'导入 main：{import_seconds * 1000:.1f} ms（预算 {args.import_budget * 1000:.0f} ms）')
+    for name, seconds in modules[:args.top]:
+        print(f'  {name:<40} {seconds * 1000:>10.1f} ms')
+    print(f'显示登录窗口：{window_seconds * 1000:.1f} ms（预算 {args.window_budget * 1000:.0f} ms）')
+
+    if import_seconds > args.import_budget:
+        failures.append('导入 main 超出预算')
+    if window_seconds > args.window_budget:
+        failures.append('显示登录窗口超出预算')
+    if loaded:
+        failures.append(f"登录窗口出现前加载了应延迟的模块：{', '.join(loaded)}")
+
+    if failures:
+        print('\n' + '\n'.join(failures))
+        return 1
+    print('\n启动时间在预算内')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())